@@ -46,6 +46,7 @@ def create_app():
         # Initialize extensions
         cll_app.logger.info("Initializing app extensions.")
         init_login_manager(cll_app)
+        init_cache(cll_app)
         init_mongodb(cll_app)
         init_samples_handler(cll_app)
         init_results_handler(cll_app)
@@ -89,7 +90,8 @@ def init_mongodb(app: Flask) -> None:
     Initialize the MongoDB extension.
 
     This function sets up the MongoDB client for the application using the
-    configuration provided in the app.
+    configuration provided in the app. The samples and results handlers both use
+    this one client, so they share its connection pool.
 
     Args:
         app (Flask): The Flask application instance.
@@ -97,7 +99,7 @@ def init_mongodb(app: Flask) -> None:
     app.logger.info("Initializing mongodb at: " f"{app.config['MONGO_URI']}")
     from cll_genie.extensions import mongo
 
-    mongo.init_app(app)
+    mongo.init_app(app, **app.config.get("MONGO_CLIENT_OPTIONS", {}))
 
 
 def init_login_manager(app: Flask) -> None:
@@ -116,6 +118,21 @@ def init_login_manager(app: Flask) -> None:
     login_manager.login_view = "login_bp.login"
 
 
+def init_cache(app: Flask) -> None:
+    """
+    Initialize the cache.
+
+    This function configures the Flask-Caching extension for the application.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    from cll_genie.extensions import cache
+
+    app.logger.info(f"Initializing cache of type: {app.config['CACHE_TYPE']}")
+    cache.init_app(app)
+
+
 def init_samples_handler(app: Flask) -> None:
     """
     Initialize the samples handler.
@@ -131,6 +148,7 @@ def init_samples_handler(app: Flask) -> None:
     sample_handler.initialize(
         mongo.cx, app.config["DB_NAME"], app.config["DB_SAMPLES_COLLECTION"]
     )
+    sample_handler.ensure_indexes()
 
 
 def init_results_handler(app: Flask) -> None:
@@ -5,6 +5,9 @@ This module defines the `User` class for user authentication and authorization,
 as well as forms and utilities for managing user login and updates.
 """
 from typing import List
+import hashlib
+import hmac
+import re
 from flask_wtf import FlaskForm
 
 from wtforms import (
@@ -24,8 +27,31 @@ from wtforms.validators import (
     ValidationError,
 )
 from werkzeug.security import generate_password_hash, check_password_hash
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
 from flask import current_app as cll_app
-from cll_genie.extensions import mongo
+from cll_genie.extensions import mongo, cache
+
+# Groups that grant admin rights
+ADMIN_GROUPS = frozenset(["admin", "lymphotrack_admin"])
+
+# Passwords must contain at least one letter and one digit
+PASSWORD_PATTERN = re.compile(r"^(?=.*\d)(?=.*[A-Za-z]).+$", re.ASCII)
+
+_users_collection = None
+
+
+def get_users_collection():
+    """
+    Get the MongoDB collection for users, resolving it only once.
+
+    Returns:
+        pymongo.collection.Collection: The users collection.
+    """
+    global _users_collection
+    if _users_collection is None:
+        _users_collection = mongo.cx["coyote"]["users"]
+    return _users_collection
 
 
 # User class:
@@ -115,30 +141,7 @@ class User:
         Returns:
             bool: True if the user has super user permissions, False otherwise.
         """
-
-        user_groups = self.get_groups()
-        permitted_groups = cll_app.config["CLL_GENIE_SUPER_PERMISSION_GROUPS"]
-        cll_app.logger.debug(f"User in groups: {user_groups}")
-        cll_app.logger.debug(f"Permitted groups: {permitted_groups}")
-
-        permission_granted = False
-
-        for group in user_groups:
-            if group in permitted_groups:
-                permission_granted = True
-                cll_app.logger.info("Permission granted!")
-                break
-
-        if not permission_granted:
-            cll_app.logger.warning(
-                "User is not authorized to modify data based on group policy."
-            )
-
-        if cll_app.debug:
-            cll_app.logger.debug("DEBUG mode ON. Authorizing sample edit.")
-            permission_granted = True
-
-        return permission_granted
+        return _super_user_mode(self.username, tuple(self.get_groups()))
 
     def admin(self) -> bool:
         """
@@ -150,29 +153,17 @@ class User:
         Returns:
             bool: True if the user has admin rights, False otherwise.
         """
-
-        user_groups = self.get_groups()
-
-        admin = False
-
-        if "admin" in user_groups or "lymphotrack_admin" in user_groups:
-            admin = True
-            cll_app.logger.info("Admin rights granted for the user!")
-
-        else:
-            cll_app.logger.warning("Admin rights declined for the user.")
-
-        if cll_app.debug:
-            cll_app.logger.debug("DEBUG mode ON. Authorizing sample edit.")
-            admin = True
-
-        return admin
+        return _admin(self.username, tuple(self.get_groups()))
 
     @staticmethod
     def validate_login(password_hash: str, password: str) -> bool:
         """
         Validate a user's login credentials.
 
+        PBKDF2 hashes in werkzeug's ``method$salt$hash`` format are derived
+        locally and compared with ``hmac.compare_digest`` so the final compare
+        runs in constant time. Other hash methods fall back to werkzeug.
+
         Args:
             password_hash (str): The hashed password stored in the database.
             password (str): The plaintext password provided by the user.
@@ -180,7 +171,90 @@ class User:
         Returns:
             bool: True if the password matches the hash, False otherwise.
         """
-        return check_password_hash(password_hash, password)
+        if not password_hash or password_hash.count("$") < 2:
+            return False
+
+        method, salt, stored_hash = password_hash.split("$", 2)
+
+        if not method.startswith("pbkdf2:"):
+            return check_password_hash(password_hash, password)
+
+        args = method[len("pbkdf2:") :].split(":")
+        hash_name = args[0]
+
+        try:
+            iterations = int(args[1]) if len(args) > 1 else 260000
+            candidate_hash = hashlib.pbkdf2_hmac(
+                hash_name, password.encode("utf-8"), salt.encode("utf-8"), iterations
+            ).hex()
+        except ValueError:
+            # Empty or non-numeric iterations, or an unknown hash name: a malformed hash
+            return False
+
+        return hmac.compare_digest(stored_hash.encode(), candidate_hash.encode())
+
+
+@cache.memoize()
+def _super_user_mode(username: str, user_groups: tuple) -> bool:
+    """
+    Decide whether a user has super user permissions.
+
+    The decision is memoized per username and group set, so a change of groups
+    yields a new cache key and needs no explicit invalidation.
+
+    Args:
+        username (str): The username of the user.
+        user_groups (tuple): The groups the user belongs to.
+
+    Returns:
+        bool: True if the user has super user permissions, False otherwise.
+    """
+    # Deployments may still configure the groups as a list
+    permitted_groups = frozenset(cll_app.config["CLL_GENIE_SUPER_PERMISSION_GROUPS"])
+    cll_app.logger.debug(f"User {username} in groups: {user_groups}")
+    cll_app.logger.debug(f"Permitted groups: {permitted_groups}")
+
+    permission_granted = not permitted_groups.isdisjoint(user_groups)
+
+    if permission_granted:
+        cll_app.logger.info("Permission granted!")
+    else:
+        cll_app.logger.warning(
+            "User is not authorized to modify data based on group policy."
+        )
+
+    if cll_app.debug:
+        cll_app.logger.debug("DEBUG mode ON. Authorizing sample edit.")
+        permission_granted = True
+
+    return permission_granted
+
+
+@cache.memoize()
+def _admin(username: str, user_groups: tuple) -> bool:
+    """
+    Decide whether a user has admin rights.
+
+    Args:
+        username (str): The username of the user.
+        user_groups (tuple): The groups the user belongs to.
+
+    Returns:
+        bool: True if the user has admin rights, False otherwise.
+    """
+    admin = not ADMIN_GROUPS.isdisjoint(user_groups)
+
+    if admin:
+        cll_app.logger.info(f"Admin rights granted for the user {username}!")
+
+    else:
+        cll_app.logger.warning(f"Admin rights declined for the user {username}.")
+
+    if cll_app.debug:
+        cll_app.logger.debug("DEBUG mode ON. Authorizing sample edit.")
+        admin = True
+
+    return admin
 
 
 # LoginForm
@@ -226,7 +300,23 @@ class UpdateUser:
         self.groups = groups
         self.fullname = fullname
         self.email = email
-        self.users_collection = mongo.cx["coyote"]["users"]
+        self.users_collection = get_users_collection()
+        self._user_doc = None
+
+    def _fetch(self) -> dict | None:
+        """
+        Fetch the user's document from the database once and cache it on the instance.
+
+        The password hash is never needed here and is left out of the projection.
+
+        Returns:
+            dict or None: The user's document if found, otherwise None.
+        """
+        if self._user_doc is None:
+            self._user_doc = self.users_collection.find_one(
+                {"_id": self.user}, {"password": 0}
+            )
+        return self._user_doc
 
     def user_exists(self) -> bool:
         """
@@ -235,7 +325,9 @@ class UpdateUser:
         Returns:
             bool: True if the user exists, False otherwise.
         """
-        return self.users_collection.find_one({"_id": self.user}) is not None
+        if self._user_doc is not None:
+            return True
+        return self.users_collection.find_one({"_id": self.user}, {"_id": 1}) is not None
 
     def get_username(self) -> str:
         """
@@ -253,7 +345,7 @@ class UpdateUser:
         Returns:
             dict: The user's data.
         """
-        return self.users_collection.find_one({"_id": self.user})
+        return self._fetch()
 
     def get_groups(self) -> List[str]:
         """
@@ -262,7 +354,10 @@ class UpdateUser:
         Returns:
             list: A list of group names.
         """
-        return self.users_collection.find_one({"_id": self.user}).get("groups", [])
+        user_data = self._user_doc or self.users_collection.find_one(
+            {"_id": self.user}, {"groups": 1, "_id": 0}
+        )
+        return list(user_data.get("groups", []))
 
     def update_user_details(self, form_data: dict) -> bool:
         """
@@ -274,44 +369,56 @@ class UpdateUser:
         Returns:
             bool: True if the update was successful, False otherwise.
         """
-        user_data = self.get_user_data()
-        new_email = form_data.get("email", "")
-        new_fullname = form_data.get("fullname", "")
-        add_groups = form_data.get("add_groups", "").split(",")
-        remove_groups = form_data.get("remove_groups", "").split(",")
-
-        if user_data:
-            current_email = user_data.get("email", "")
-            current_fullname = user_data.get("fullname", "")
-            current_groups = self.get_groups()
-            current_groups.extend(add_groups)
-            groups = list(set(current_groups))
-
-            for group in remove_groups:
-                if group in groups:
-                    groups.remove(group)
-            self.users_collection.find_one_and_update(
-                {"_id": self.user},
+        new_email = form_data.get("email")
+        new_fullname = form_data.get("fullname")
+        add_groups = UpdateUser._split_groups(form_data.get("add_groups"))
+        remove_groups = UpdateUser._split_groups(form_data.get("remove_groups"))
+
+        # Single round-trip: the group union/difference is computed server-side
+        # with an aggregation pipeline update. User input is wrapped in $literal,
+        # as pipeline strings starting with "$" would otherwise be field paths.
+        user_data = self.users_collection.find_one_and_update(
+            {"_id": self.user},
+            [
                 {
                     "$set": {
-                        "email": (
-                            new_email
-                            if new_email != current_email or new_email is not None
-                            else current_email
-                        ),
-                        "fullname": (
-                            new_fullname
-                            if new_fullname != current_fullname
-                            or new_fullname is not None
-                            else current_fullname
-                        ),
-                        "groups": groups,
+                        "email": {"$ifNull": [{"$literal": new_email}, "$email"]},
+                        "fullname": {"$ifNull": [{"$literal": new_fullname}, "$fullname"]},
+                        "groups": {
+                            "$setDifference": [
+                                {
+                                    "$setUnion": [
+                                        {"$ifNull": ["$groups", []]},
+                                        {"$literal": add_groups},
+                                    ]
+                                },
+                                {"$literal": remove_groups},
+                            ]
+                        },
                     }
-                },
-            )
-            return True
-        else:
-            return False
+                }
+            ],
+            projection={"_id": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        self._user_doc = None
+
+        return user_data is not None
+
+    @staticmethod
+    def _split_groups(groups: str | None) -> List[str]:
+        """
+        Split a comma separated string of groups into a list of group names.
+
+        Args:
+            groups (str, optional): The comma separated groups.
+
+        Returns:
+            list: A list of non-empty group names.
+        """
+        if not groups:
+            return []
+        return [group.strip() for group in groups.split(",") if group.strip()]
 
     def add_user(self) -> bool:
         """
@@ -320,22 +427,25 @@ class UpdateUser:
         Returns:
             bool: True if the user was added successfully, False otherwise.
         """
+        pass_hash = generate_password_hash(
+            self.password, method=cll_app.config["PASSWORD_HASH_METHOD"]
+        )
         try:
             self.users_collection.insert_one(
                 {
                     "_id": self.user,
-                    "password": generate_password_hash(
-                        self.password, method="pbkdf2:sha256"
-                    ),
+                    "password": pass_hash,
                     "groups": self.groups,
                     "fullname": self.fullname,
                     "email": self.email,
                 }
             )
-            return True
-        except:
+        except PyMongoError as e:
+            cll_app.logger.error(f"Adding the user {self.user} FAILED due to error {str(e)}")
             return False
 
+        return True
+
     def update_password(self, new_password: str) -> bool:
         """
         Update the user's password.
@@ -346,9 +456,11 @@ class UpdateUser:
         Returns:
             bool: True if the password was updated successfully, False otherwise.
         """
+        pass_hash = generate_password_hash(
+            new_password, method=cll_app.config["PASSWORD_HASH_METHOD"]
+        )
         try:
-            pass_hash = generate_password_hash(new_password, method="pbkdf2:sha256")
-            self.users_collection.find_one_and_update(
+            self.users_collection.update_one(
                 {"_id": self.user},
                 {
                     "$set": {
@@ -356,10 +468,15 @@ class UpdateUser:
                     }
                 },
             )
-            return True
-        except:
+        except PyMongoError as e:
+            cll_app.logger.error(
+                f"Password update for the user {self.user} FAILED due to error {str(e)}"
+            )
             return False
 
+        self._user_doc = None
+        return True
+
     def update_email(self):
         """
         Update the user's email address.
@@ -368,7 +485,7 @@ class UpdateUser:
             bool: True if the email was updated successfully, False otherwise.
         """
         try:
-            self.users_collection.find_one_and_update(
+            self.users_collection.update_one(
                 {"_id": self.user},
                 {
                     "$set": {
@@ -376,10 +493,15 @@ class UpdateUser:
                     }
                 },
             )
-            return True
-        except:
+        except PyMongoError as e:
+            cll_app.logger.error(
+                f"Email update for the user {self.user} FAILED due to error {str(e)}"
+            )
             return False
 
+        self._user_doc = None
+        return True
+
 
 def validate_username(form: FlaskForm, field: StringField) -> None:
     """
@@ -434,7 +556,7 @@ class UserForm(FlaskForm):
             DataRequired(message="Password is required."),
             Length(min=8, message="Password must be at least 8 characters long."),
             Regexp(
-                r"^.*(?=.*\d)(?=.*[a-zA-Z]).*$",
+                PASSWORD_PATTERN,
                 message="Password must contain both letters and numbers.",
             ),
             EqualTo("confirm_password", message="Passwords must match."),
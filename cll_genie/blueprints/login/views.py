@@ -3,7 +3,7 @@ from flask import current_app as cll_app  # type: ignore
 from flask import request, render_template, redirect, url_for, flash, abort  # type: ignore
 from flask_login import login_required, login_user, logout_user, current_user  # type: ignore
 
-from cll_genie.extensions import login_manager, mongo
+from cll_genie.extensions import login_manager
 from cll_genie.blueprints.login import login_bp
 from cll_genie.blueprints.login.login import (
     LoginForm,
@@ -12,6 +12,7 @@ from cll_genie.blueprints.login.login import (
     UpdateUser,
     SearchUserForm,
     EditUserForm,
+    get_users_collection,
 )
 
 
@@ -29,7 +30,7 @@ def login():
         form = LoginForm()
 
         if request.method == "POST" and form.validate_on_submit():
-            users_collection = mongo.cx["coyote"]["users"]
+            users_collection = get_users_collection()
             user = users_collection.find_one({"_id": form.username.data})
             if user and User.validate_login(user["password"], form.password.data):
                 user_obj = User(
@@ -77,8 +78,8 @@ def load_user(username):
     Returns:
         User or None: The User object if found, otherwise None.
     """
-    users_collection = mongo.cx["coyote"]["users"]
-    user = users_collection.find_one({"_id": username})
+    users_collection = get_users_collection()
+    user = users_collection.find_one({"_id": username}, {"password": 0})
     if not user:
         return None
     return User(
@@ -150,10 +151,10 @@ def update_user():
     if search_form.validate_on_submit() and search_form.submit.data:
         username = search_form.username.data
         user_obj = UpdateUser(user=username)
-        user_found = user_obj.user_exists()
+        user_data = user_obj.get_user_data()
+        user_found = user_data is not None
 
         if user_found:
-            user_data = user_obj.get_user_data()
             edit_form = EditUserForm()
             edit_form.user_id.data = user_obj.get_username()
             edit_form.fullname.data = user_data.get("fullname", "")
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from flask import flash
@@ -19,6 +20,16 @@ class ProcessExcel:
         valid_format (bool): True if the input file format is valid, False otherwise.
     """
 
+    NUMERIC_COLUMNS = [
+        "Rank",
+        "Length",
+        "Merge count",
+        "% total reads",
+        "Cumulative %",
+        "Mutation rate to partial V-gene (%)",
+        "V-coverage",
+    ]
+
     def __init__(
         self,
         file,
@@ -43,16 +54,29 @@ class ProcessExcel:
 
         self.file = file
         self.excel_header_row = int(excel_header_row)
+        if self.excel_header_row < 0:
+            raise ValueError(
+                f"Excel header row must be a non-negative number, got {excel_header_row}"
+            )
         self.excel_sheet_name = excel_sheet_name
         self.filtration_cutoff = int(filtration_cutoff)
         self.no_stop_codon = no_stop_codon
         self.is_in_frame = is_in_frame
         self.file_path = file
 
-    def read(self) -> pd.DataFrame:
+    def read(self, header=None, nrows=None, usecols=None, dtype=None) -> pd.DataFrame:
         """
         Reads a file based on its extension and returns a pandas DataFrame.
 
+        The calamine engine reads cell values straight into the frame without building
+        an openpyxl workbook model, and stops after ``nrows`` rows when it is given.
+
+        Args:
+            header (int, optional): The row to use as column names. Defaults to None.
+            nrows (int, optional): The number of rows to read. Defaults to all rows.
+            usecols (list, optional): The columns to read. Defaults to all columns.
+            dtype (dict, optional): The data types to apply per column. Defaults to None.
+
         Returns:
             pandas.DataFrame or None: The DataFrame containing the data from the file, or None if there was an error.
         """
@@ -61,14 +85,43 @@ class ProcessExcel:
             data = pd.read_excel(
                 self.file_path,
                 sheet_name=self.excel_sheet_name,
-                header=None,
-                engine="openpyxl",
+                header=header,
+                nrows=nrows,
+                usecols=usecols,
+                dtype=dtype,
+                engine="calamine",
             )
         except FileNotFoundError as e:
             cll_app.logger.error(str(e))
 
         return data
 
+    @staticmethod
+    def to_numeric(column: pd.Series) -> pd.Series:
+        """
+        Convert a column of comma decimal strings to a NumPy-backed numeric column.
+
+        The parsing runs on Arrow kernels, but the result is handed back with NumPy dtypes
+        so the views see NaN rather than pd.NA for missing values.
+
+        Args:
+            column (pandas.Series): The Arrow string column to convert.
+
+        Returns:
+            pandas.Series: An int64 column if every value is a whole number, float64 otherwise.
+        """
+        converted = pd.to_numeric(
+            column.str.replace(",", ".", regex=False),
+            errors="coerce",
+            dtype_backend="pyarrow",
+        )
+        if converted.hasnans:
+            values = converted.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            values = converted.to_numpy(dtype=converted.dtype.numpy_dtype)
+
+        return pd.Series(values, index=column.index, name=column.name)
+
     def filter_data(self) -> tuple:
         """
         Filters data based on given conditions and returns filtered data as a pandas DataFrame.
@@ -81,11 +134,16 @@ class ProcessExcel:
 
         try:
             if ext in self.accepted_input_formats:
-                df = self.read()
-                meta_info = df[: self.excel_header_row]
-                meta_info = dict(zip(meta_info[0], meta_info[1]))
-                df_no_meta = df[self.excel_header_row + 1 :]
-                df_no_meta.columns = list(df.iloc[self.excel_header_row])
+                # The metadata block above the header row is a two column key/value list
+                meta_df = self.read(nrows=self.excel_header_row, usecols=[0, 1])
+                meta_info = dict(zip(meta_df[0], meta_df[1]))
+
+                # Numeric columns are read as Arrow strings so their comma decimals can be
+                # converted with Arrow compute kernels
+                df_no_meta = self.read(
+                    header=self.excel_header_row,
+                    dtype={col: "string[pyarrow]" for col in ProcessExcel.NUMERIC_COLUMNS},
+                )
             else:
                 raise ValueError(f"File format not recognized for {path}")
         except ValueError as e:
@@ -94,46 +152,27 @@ class ProcessExcel:
         try:
             if df_no_meta is not None:
 
-                # Convert the columns to numeric from comma separated to dot separated
-                columns_to_covert: list[str] = [
-                    "% total reads",
-                    "Cumulative %",
-                    "Mutation rate to partial V-gene (%)",
-                    "V-coverage",
-                ]
-                for col in columns_to_covert:
-                    df_no_meta[col] = df_no_meta[col].astype(str).str.replace(",", ".", regex=False)
-
-                # Convert numeric columns to numeric data types
-                columns_to_numeric = [
-                    "Rank",
-                    "Length",
-                    "Merge count",
-                    "% total reads",
-                    "Cumulative %",
-                    "Mutation rate to partial V-gene (%)",
-                    "V-coverage",
-                ]
-
-                for col in columns_to_numeric:
-                    df_no_meta[col] = pd.to_numeric(df_no_meta[col], errors="coerce")
-
-                # Filter the data based on the given conditions
-
-                filtered_data = df_no_meta[
-                    df_no_meta["% total reads"] >= int(self.filtration_cutoff)
-                ]
-                print(filtered_data)
+                # Convert numeric columns from comma separated to dot separated
+                # decimals and to numeric data types in a single vectorized pass
+                numeric_columns = ProcessExcel.NUMERIC_COLUMNS
+                df_no_meta[numeric_columns] = df_no_meta[numeric_columns].apply(
+                    ProcessExcel.to_numeric
+                )
+
+                # Filter the data based on the given conditions with a single boolean mask
+                mask = (df_no_meta["% total reads"] >= self.filtration_cutoff).to_numpy(
+                    dtype=bool, na_value=False
+                )
 
                 if self.is_in_frame != "B":
-                    filtered_data = filtered_data[
-                        filtered_data["In-frame (Y/N)"] == self.is_in_frame
-                    ]
+                    mask &= df_no_meta["In-frame (Y/N)"].to_numpy() == self.is_in_frame
 
                 if self.no_stop_codon != "B":
-                    filtered_data = filtered_data[
-                        filtered_data["No Stop codon (Y/N)"] == self.no_stop_codon
-                    ]
+                    mask &= (
+                        df_no_meta["No Stop codon (Y/N)"].to_numpy() == self.no_stop_codon
+                    )
+
+                filtered_data = df_no_meta[mask]
 
             else:
                 raise ValueError(f"Data is empty from the file: {path}")
@@ -158,11 +197,10 @@ class ProcessExcel:
         Returns:
             str: A string containing the sequences in FASTA format.
         """
-        ranks_sequences = list(dataframe[["Rank", "Sequence"]].to_records(index=False))
-
-        sequences_str = ""
-
-        for seq_record_pair in ranks_sequences:
-            sequences_str += f">{seq_record_pair[0]}\n{seq_record_pair[1]}\n"
-
-        return sequences_str
+        return "".join(
+            f">{rank}\n{sequence}\n"
+            for rank, sequence in zip(
+                dataframe["Rank"].to_numpy().tolist(),
+                dataframe["Sequence"].to_numpy().tolist(),
+            )
+        )
@@ -1,7 +1,11 @@
 from cll_genie.blueprints.main import main_bp
 from datetime import datetime
-import dateutil
+import dateutil.tz
 import arrow
+from markupsafe import Markup, escape
+
+# Time zone used for human readable dates, resolved once at import
+TIME_ZONE = dateutil.tz.gettz("CET")
 
 
 @main_bp.app_template_filter()
@@ -43,8 +47,7 @@ def simple_date(date: str) -> str:
     Returns:
         str: The date part of the string in 'YYYY-MM-DD' format.
     """
-    date = date.split("T").pop(0)
-    return date
+    return date[:10] if date else date
 
 
 @main_bp.app_template_filter()
@@ -58,8 +61,9 @@ def human_date(value):
     Returns:
         str: A human-readable representation of the datetime.
     """
-    time_zone = "CET"
-    return arrow.get(value).replace(tzinfo=dateutil.tz.gettz(time_zone)).humanize()
+    if isinstance(value, datetime):
+        return arrow.Arrow.fromdatetime(value, tzinfo=TIME_ZONE).humanize()
+    return arrow.get(value).replace(tzinfo=TIME_ZONE).humanize()
 
 
 @main_bp.app_template_filter()
@@ -67,14 +71,16 @@ def format_comment(st):
     """
     Custom Jinja2 filter to format a string by replacing newline characters with HTML line breaks.
 
+    The string is HTML-escaped first and returned as Markup, so the inserted line breaks
+    are not escaped again by Jinja.
+
     Args:
         st (str): The string to be formatted.
 
     Returns:
-        str: The formatted string with newline characters replaced by '<br />'.
+        Markup: The formatted string with newline characters replaced by '<br />'.
     """
     if st:
-        st = st.replace("\n", "<br />")
-        return st
+        return Markup(escape(st).replace("\n", Markup("<br />")))
     else:
         return st
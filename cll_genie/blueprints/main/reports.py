@@ -1,12 +1,16 @@
-from copy import deepcopy
 from pprint import pformat
 from flask import current_app as cll_app
 import os
+import logging
+import numpy as np
 from pymongo.errors import PyMongoError
 from cll_genie.extensions import sample_handler
 from cll_genie.extensions import results_handler
 from typing import Any
 
+# Report output directories already created by this process
+_reports_dir_ensured = set()
+
 
 class ReportController:
     """
@@ -81,6 +85,33 @@ class ReportController:
         "JUNCTION decryption",
     ]
 
+    @staticmethod
+    def _load_submission(
+        _id: str,
+        submission_id: str,
+        fields: tuple = ("vquest_parameters", "vquest_results", "submission_comments"),
+    ) -> tuple | None:
+        """
+        Fetch selected fields of a single submission from the results database in one round trip.
+
+        Args:
+            _id (str): The ID of the sample.
+            submission_id (str): The ID of the submission.
+            fields (tuple, optional): The submission fields to fetch. Defaults to the
+                vquest parameters, vquest results and submission comments.
+
+        Returns:
+            tuple | None: The values of the requested fields in the same order, or None if
+            the submission is not found.
+        """
+        submission = ReportController.results_handler.get_results_projected(
+            _id, submission_id, fields
+        )
+        if submission is None:
+            return None
+
+        return tuple(submission.get(field) for field in fields)
+
     @staticmethod
     def get_parameters_for_report(_id: str, submission_id: str) -> dict | None:
         """
@@ -93,12 +124,12 @@ class ReportController:
         Returns:
             dict | None: The processed parameters for the report, or None if not found.
         """
-        try:
-            return ReportController.results_handler.get_results(_id)["results"][
-                submission_id
-            ]["vquest_parameters"]
-        except:
+        submission = ReportController._load_submission(
+            _id, submission_id, fields=("vquest_parameters",)
+        )
+        if submission is None:
             return None
+        return submission[0]
 
     @staticmethod
     def get_summary_for_report(_id: str, submission_id: str) -> dict | None:
@@ -113,43 +144,12 @@ class ReportController:
             dict | None: The processed summary for the report, or None if not found.
         """
 
-        def subset_dict(d: dict, l: list) -> dict:
-            """
-            Create a subset of a dictionary based on a list of keys.
-
-            Args:
-                d (dict): The original dictionary.
-                l (list): The list of keys to include in the subset.
-
-            Returns:
-                dict: The subset dictionary.
-            """
-            return {k: d[k] for k in l if k in d}
-
-        if ReportController.results_handler.results_document_exists(_id):
-            detailed_results = ReportController.results_handler.get_results(_id)[
-                "results"
-            ][submission_id]["vquest_results"]
-            summary_results = {}
-
-            for seq_id in detailed_results.keys():
-                summary_results[seq_id] = {}
-                summary_results[seq_id].update(
-                    subset_dict(
-                        detailed_results[seq_id]["summary"],
-                        ReportController.REPORT_SUMMARY_COLUMNS,
-                    )
-                )
-                summary_results[seq_id].update(
-                    subset_dict(
-                        detailed_results[seq_id]["junction"],
-                        ReportController.REPORT_JUNCTION_COLUMNS,
-                    )
-                )
-
-            return summary_results
-        else:
-            return None
+        return ReportController.results_handler.get_submission_summaries(
+            _id,
+            submission_id,
+            ReportController.REPORT_SUMMARY_COLUMNS,
+            ReportController.REPORT_JUNCTION_COLUMNS,
+        )
 
     @staticmethod
     def get_comments_for_report(_id: str, submission_id: str) -> dict | None:
@@ -164,11 +164,11 @@ class ReportController:
             dict | None: The processed comments for the report, or None if not found.
         """
 
-        if ReportController.results_handler.results_document_exists(_id):
-            comments = ReportController.results_handler.get_results(_id)["results"][
-                submission_id
-            ]["submission_comments"]
-            return comments
+        submission = ReportController._load_submission(
+            _id, submission_id, fields=("submission_comments",)
+        )
+        if submission is not None:
+            return submission[0]
         else:
             return None
 
@@ -228,14 +228,45 @@ class ReportController:
         Returns:
             int: The next available report ID.
         """
+        last_report_num = ReportController.sample_handler.get_report_counter(
+            _id, submission_id
+        )
+        if last_report_num is not None:
+            return last_report_num + 1
+
+        # Samples reported before the counter existed: derive it from the report ids.
+        # Nothing is written here; record_submission_report seeds the counter on export.
         submission_reports = ReportController.sample_handler.get_submission_reports(
             _id, submission_id
         )
         if len(submission_reports) > 0:
-            return int(submission_reports[-1].split("_")[-1]) + 1
+            last_report_num = max(
+                int(report.rsplit("_", 1)[-1]) for report in submission_reports
+            )
+            return last_report_num + 1
         else:
             return 1
 
+    @staticmethod
+    def record_submission_report(_id: str, report_id: str) -> bool:
+        """
+        Advance the report counter of a submission after a report has been exported.
+
+        Args:
+            _id (str): The ID of the sample.
+            report_id (str): The exported report ID, e.g. "{sample_name}_{submission_num}_{report_num}".
+
+        Returns:
+            bool: True if the counter was updated, False otherwise.
+        """
+        try:
+            _, submission_num, report_num = report_id.rsplit("_", 2)
+            return ReportController.sample_handler.set_report_counter(
+                _id, submission_num, int(report_num)
+            )
+        except ValueError:
+            return False
+
     @staticmethod
     def get_html_filename(_id: str, submission_id: str, neg=False) -> str:
         """
@@ -251,8 +282,9 @@ class ReportController:
         """
         sample_name = ReportController.sample_handler.get_sample_name(_id)
         reports_dir = cll_app.config["REPORT_OUTDIR"]
-        if not os.path.exists(reports_dir):
-            os.makedirs(reports_dir)
+        if reports_dir not in _reports_dir_ensured:
+            os.makedirs(reports_dir, exist_ok=True)
+            _reports_dir_ensured.add(reports_dir)
 
         if neg:
             report_id = f"{sample_name}_NR"
@@ -274,12 +306,7 @@ class ReportController:
         Returns:
             bool: True if all sequences are in-frame, False otherwise.
         """
-        is_inframe_status = True
-        for seq in results_dict:
-            if not results_dict[seq]["summary"]["Inframe"]:
-                is_inframe_status = False
-                break
-        return is_inframe_status
+        return all(result["summary"]["Inframe"] for result in results_dict.values())
 
     @staticmethod
     def get_stop_codon_status(results_dict) -> bool:
@@ -292,12 +319,30 @@ class ReportController:
         Returns:
             bool: True if any sequence has a stop codon, False otherwise.
         """
+        return any(result["summary"]["Stop Codon"] for result in results_dict.values())
+
+    @staticmethod
+    def get_frame_status(results_dict) -> tuple[bool, bool]:
+        """
+        Check the in-frame and stop codon status of all sequences in a single pass.
+
+        Args:
+            results_dict (dict): The results dictionary.
+
+        Returns:
+            tuple[bool, bool]: Whether all sequences are in-frame, and whether any sequence has a stop codon.
+        """
+        is_inframe_status = True
         has_stop_codon_status = False
-        for seq in results_dict:
-            if results_dict[seq]["summary"]["Stop Codon"]:
+        for result in results_dict.values():
+            summary = result["summary"]
+            if not summary["Inframe"]:
+                is_inframe_status = False
+            if summary["Stop Codon"]:
                 has_stop_codon_status = True
+            if not is_inframe_status and has_stop_codon_status:
                 break
-        return has_stop_codon_status
+        return is_inframe_status, has_stop_codon_status
 
     @staticmethod
     def generate_report_summary_text(_id: str, submission_id: str) -> str:
@@ -312,68 +357,65 @@ class ReportController:
             str: The generated summary text.
         """
         try:
-            results_summary = ReportController.results_handler.get_results(_id)[
-                "results"
-            ][submission_id]["vquest_results"]
+            results_parameters, results_summary = ReportController._load_submission(
+                _id, submission_id, fields=("vquest_parameters", "vquest_results")
+            )
+            if not results_summary:
+                return None
             number_of_submitted_seqs = int(
-                ReportController.get_parameters_for_report(_id, submission_id)[
-                    "Number of submitted sequences"
-                ]
+                results_parameters["Number of submitted sequences"]
             )
-            is_inframe = ReportController.get_not_inframe_status(results_summary)
-            has_stop_codon = ReportController.get_stop_codon_status(results_summary)
-        except:
-            number_of_submitted_seqs = 0
-            results_summary = None
-            is_inframe = False
-            has_stop_codon = True
+            is_inframe, has_stop_codon = ReportController.get_frame_status(
+                results_summary
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # Common comment
+        summary_parts = ["DNA har extraherats från insänt prov och analyserats med massiv parallell sekvensering (MPS, även kallat NGS). Analysen omfattar detektion av klonalt IGHV-D-J genrearrangemang, IGHV-mutationsstatus (muterad, M-CLL eller icke muterad, U-CLL), samt subsettillhörighet (subset #2 eller #8). \n\n"]
 
         # Rearrangement comment
-        if results_summary:
-            # Common comment
-            summary_string = "DNA har extraherats från insänt prov och analyserats med massiv parallell sekvensering (MPS, även kallat NGS). Analysen omfattar detektion av klonalt IGHV-D-J genrearrangemang, IGHV-mutationsstatus (muterad, M-CLL eller icke muterad, U-CLL), samt subsettillhörighet (subset #2 eller #8). \n\n"
-
-            if number_of_submitted_seqs == 0:
-                summary_string += "DNA har extraherats från insänt prov och analyserats med massiv parallell sekvensering (MPS, även kallat NGS). Analysen omfattar detektion av klonalt IGHV-D-J rearrangemang, IGHV-mutationsstatus (muterad, M-CLL eller icke muterad, U-CLL), samt subsettillhörighet (subset #2 eller #8). \n\n"
-            elif number_of_submitted_seqs == 1:
-                if not is_inframe or has_stop_codon:
-                    summary_string += "Vid analysen finner man en klonal sekvens, men då sekvensen saknar ett funktionellt (produktivt) IGHV-D-J rearrangemang kan IGHV-mutationsstatus inte fastställas. Vi rekommenderar därför att ett nytt blodprov skickas för en utökad analys på RNA-nivå för identifiering av ett klonalt och funktionellt IGHV-D-J rearrangemang där IGHV-mutationsanalys och subset-analys kan utföras. (Provet/RNA skickas till Salgrenska sjukhuset (Göteborg) för analys av RNA). \n\n"
-                else:
-                    summary_string += "Vid analysen finner man en klonal sekvens med ett funktionellt (produktivt) IGHV-D-J rearrangemang (se tabell seq1).\n\n"
-            elif number_of_submitted_seqs > 1:
-                table_string = ", ".join(
-                    [f"Seq{x}" for x in range(1, number_of_submitted_seqs + 1)]
-                )
-                summary_string += f"Vid analysen finner man {ReportController.swedish_number_string[number_of_submitted_seqs]} klonala sekvenser och har funktionella (produktiva) IGHV-D-J rearrangemang. (se tabeller; {table_string}) \n\n"
+        if number_of_submitted_seqs == 0:
+            summary_parts.append("DNA har extraherats från insänt prov och analyserats med massiv parallell sekvensering (MPS, även kallat NGS). Analysen omfattar detektion av klonalt IGHV-D-J rearrangemang, IGHV-mutationsstatus (muterad, M-CLL eller icke muterad, U-CLL), samt subsettillhörighet (subset #2 eller #8). \n\n")
+        elif number_of_submitted_seqs == 1:
+            if not is_inframe or has_stop_codon:
+                summary_parts.append("Vid analysen finner man en klonal sekvens, men då sekvensen saknar ett funktionellt (produktivt) IGHV-D-J rearrangemang kan IGHV-mutationsstatus inte fastställas. Vi rekommenderar därför att ett nytt blodprov skickas för en utökad analys på RNA-nivå för identifiering av ett klonalt och funktionellt IGHV-D-J rearrangemang där IGHV-mutationsanalys och subset-analys kan utföras. (Provet/RNA skickas till Salgrenska sjukhuset (Göteborg) för analys av RNA). \n\n")
+            else:
+                summary_parts.append("Vid analysen finner man en klonal sekvens med ett funktionellt (produktivt) IGHV-D-J rearrangemang (se tabell seq1).\n\n")
+        elif number_of_submitted_seqs > 1:
+            table_string = ", ".join(
+                map("Seq{}".format, range(1, number_of_submitted_seqs + 1))
+            )
+            summary_parts.append(f"Vid analysen finner man {ReportController.swedish_number_string[number_of_submitted_seqs]} klonala sekvenser och har funktionella (produktiva) IGHV-D-J rearrangemang. (se tabeller; {table_string}) \n\n")
 
-            # Hyper mutation status comment
-            if is_inframe and not has_stop_codon:
-                summary_string += (
-                    f"{ReportController.get_hypermutation_string(results_summary)}\n\n"
-                )
+        # Hyper mutation status comment
+        if is_inframe and not has_stop_codon:
+            summary_parts.append(
+                f"{ReportController.get_hypermutation_string(results_summary)}\n\n"
+            )
 
-                # Subset comment
-                (
-                    subset_string,
-                    subset_id,
-                ) = ReportController.get_subset_string(results_summary)
-                summary_string += f"{subset_string}\n\n"
-
-                # Clinical Comments
-                if "(U-CLL)" in summary_string or "(M-CLL)" in summary_string:
-                    summary_string += "IGHV-mutationsstatus, i detta fall [M-CLL/U-CLL], är en prognostisk (riskstratifierande) markör samt vägleder behandlingsval för KLL (Nationellt Vårdprogram 2024, ERIC Guidelines 2022). \n\n"
-                elif "borderline" in summary_string:
-                    summary_string += "5)	IGHV-mutationsstatus med borderlinetillhörighet bör beaktas med försiktighet (ERIC Guidelines 2022). \n\n"
-
-                # STILL NEED TO BE MODIFIED
-                if subset_id == "#2":
-                    summary_string += "Subset #2 utgör en prognostisk markör som är oberoende av mutationsstatus (Nationellt Vårdprogram 2024, ERIC Guidelines 2022). \n\n"
-                elif subset_id == "#8":
-                    summary_string += "Subset #8 är en prognostisk markör och har beskrivits vara associerad med en ökad risk att utveckla Richtertransformation (Nationellt Vårdprogram 2024, ERIC Guidelines 2022). \n\n"
-        else:
-            summary_string = None
+            # Subset comment
+            (
+                subset_string,
+                subset_id,
+            ) = ReportController.get_subset_string(results_summary)
+            summary_parts.append(f"{subset_string}\n\n")
+
+            # Clinical Comments
+            if any(
+                "(U-CLL)" in part or "(M-CLL)" in part for part in summary_parts
+            ):
+                summary_parts.append("IGHV-mutationsstatus, i detta fall [M-CLL/U-CLL], är en prognostisk (riskstratifierande) markör samt vägleder behandlingsval för KLL (Nationellt Vårdprogram 2024, ERIC Guidelines 2022). \n\n")
+            elif any("borderline" in part for part in summary_parts):
+                summary_parts.append("5)	IGHV-mutationsstatus med borderlinetillhörighet bör beaktas med försiktighet (ERIC Guidelines 2022). \n\n")
+
+            # STILL NEED TO BE MODIFIED
+            if subset_id == "#2":
+                summary_parts.append("Subset #2 utgör en prognostisk markör som är oberoende av mutationsstatus (Nationellt Vårdprogram 2024, ERIC Guidelines 2022). \n\n")
+            elif subset_id == "#8":
+                summary_parts.append("Subset #8 är en prognostisk markör och har beskrivits vara associerad med en ökad risk att utveckla Richtertransformation (Nationellt Vårdprogram 2024, ERIC Guidelines 2022). \n\n")
 
-        return summary_string
+        return "".join(summary_parts)
 
     @staticmethod
     def get_mutation_status_per_seq(results) -> dict[Any, float]:
@@ -386,27 +428,25 @@ class ReportController:
         Returns:
             dict[Any, float]: A dictionary mapping each sequence ID to its V-REGION identity percentage (rounded to two decimals).
         """
-        seqs = list(results.keys())
-        v_identity = {
-            seq_id: round(float(results[seq_id]["V-REGION identity %"]), 2)
-            for seq_id in seqs
-        }
-        mutation_status = {}
-        for seq_id in seqs:
-            if (
-                v_identity[seq_id]
-                < cll_app.config["HYPER_MUTATION_BORDERLINE_LOWER_CUTOFF"]
-            ):
-                mutation_status[seq_id] = "M-CLL"
-            elif (
-                v_identity[seq_id]
-                > cll_app.config["HYPER_MUTATION_BORDERLINE_UPPER_CUTOFF"]
-            ):
-                mutation_status[seq_id] = "U-CLL"
-            else:
-                mutation_status[seq_id] = "Borderline"
+        cutoff_lo = cll_app.config["HYPER_MUTATION_BORDERLINE_LOWER_CUTOFF"]
+        cutoff_hi = cll_app.config["HYPER_MUTATION_BORDERLINE_UPPER_CUTOFF"]
+
+        seqs = list(results)
+        v_identity = np.round(
+            np.fromiter(
+                (float(result["V-REGION identity %"]) for result in results.values()),
+                dtype=np.float64,
+                count=len(seqs),
+            ),
+            2,
+        )
+        status = np.where(
+            v_identity < cutoff_lo,
+            "M-CLL",
+            np.where(v_identity > cutoff_hi, "U-CLL", "Borderline"),
+        )
 
-        return mutation_status
+        return dict(zip(seqs, status.tolist()))
 
     @staticmethod
     def get_hypermutation_string(results_dict):
@@ -421,42 +461,39 @@ class ReportController:
             str: A summary string in Swedish indicating the hypermutation status (U-CLL, M-CLL, borderline, or inconclusive)
                 based on the V-REGION identity percentages of the sequences.
         """
-        seqs = list(results_dict.keys())
-        seq_count = len(seqs)
-        return_string = ""
-        v_identity = [
-            round(float(results_dict[seq_id]["summary"]["V-REGION identity %"]), 2)
-            for seq_id in seqs
-        ]
-        v_identity_string = "%, ".join(str(x) for x in deepcopy(v_identity))
+        cutoff_lo = cll_app.config["HYPER_MUTATION_BORDERLINE_LOWER_CUTOFF"]
+        cutoff_hi = cll_app.config["HYPER_MUTATION_BORDERLINE_UPPER_CUTOFF"]
 
-        if all(
-            float(v_identity_per)
-            > cll_app.config["HYPER_MUTATION_BORDERLINE_UPPER_CUTOFF"]
-            for v_identity_per in v_identity
-        ):
+        seq_count = len(results_dict)
+        return_string = ""
+        v_identity = []
+        n_m = n_u = n_b = 0
+        for seq_result in results_dict.values():
+            v_identity_per = round(
+                float(seq_result["summary"]["V-REGION identity %"]), 2
+            )
+            v_identity.append(v_identity_per)
+            if v_identity_per > cutoff_hi:
+                n_u += 1
+            elif v_identity_per < cutoff_lo:
+                n_m += 1
+            elif cutoff_lo <= v_identity_per <= cutoff_hi:
+                n_b += 1
+        v_identity_string = "%, ".join(f"{x}" for x in v_identity)
+
+        if n_u == seq_count:
             if seq_count == 1:
                 return_string = f"Analysen påvisar ingen somatisk hypermutation (U-CLL) ({v_identity_string}% identitet mot IGHV-genen)."  # 2.b
             elif seq_count > 1:
                 return_string = f"Analysen av de {ReportController.swedish_number_string[seq_count]} produktiva IGH-gensekvenserna påvisar samstämmig avsaknad av somatisk hypermutation (U-CLL) ({v_identity_string}% identitet mot IGHV-genen)."  # 2.e
 
-        elif all(
-            float(v_identity_per)
-            < cll_app.config["HYPER_MUTATION_BORDERLINE_LOWER_CUTOFF"]
-            for v_identity_per in v_identity
-        ):
+        elif n_m == seq_count:
             if seq_count == 1:
                 return_string = f"Analysen påvisar somatisk hypermutation (M-CLL) ({v_identity_string}% identitet mot IGHV-genen)."  # 2.a
             elif seq_count > 1:
                 return_string = f"Analysen av de {ReportController.swedish_number_string[seq_count]} produktiva IGH-gensekvenserna påvisar samstämmig förekomst av somatisk hypermutation (M-CLL) ({v_identity_string}% identitet mot IGHV-genen)."  # 2.d
 
-        elif all(
-            float(v_identity_per)
-            >= cll_app.config["HYPER_MUTATION_BORDERLINE_LOWER_CUTOFF"]
-            and float(v_identity_per)
-            <= cll_app.config["HYPER_MUTATION_BORDERLINE_UPPER_CUTOFF"]
-            for v_identity_per in v_identity
-        ):
+        elif n_b == seq_count:
             if seq_count == 1:
                 return_string = f"Analysen påvisar ett borderline-resultat ({v_identity_string}% identitet mot IGHV-genen)."  # 2.c
             elif seq_count > 1:
@@ -481,27 +518,22 @@ class ReportController:
         Args:
             results_dict \(dict\): Dictionary where each key is a sequence ID and the value contains summary information, including CLL subset\.
         """
-        seqs = list(results_dict.keys())
         return_string = ""
         return_subset = None
-        subset_ids = list(
-            set(
-                [
-                    results_dict[seq_id]["summary"]["CLL subset"]
-                    for seq_id in seqs
-                    if results_dict[seq_id]["summary"]["CLL subset"] is not None
-                ]
-            )
-        )
+        subset_ids = {
+            subset_id
+            for result in results_dict.values()
+            if (subset_id := result["summary"]["CLL subset"]) is not None
+        }
         subset_count = len(subset_ids)
 
-        if subset_count == 1 and subset_ids[0] is not None:
+        if subset_count == 1:
+            return_subset = next(iter(subset_ids))
             return_string = (
-                f"Vidare påvisas subsettillhörighet till subset {subset_ids[0]}."
+                f"Vidare påvisas subsettillhörighet till subset {return_subset}."
             )
-            return_subset = subset_ids[0]
 
-        elif (subset_count == 1 and subset_ids[0] is None) or subset_count == 0:
+        elif subset_count == 0:
             return_string = f"Analysen påvisar ingen subsettillhörighet."
 
         elif subset_count > 1:
@@ -524,9 +556,10 @@ class ReportController:
         update_instructions = {"$unset": {f"cll_reports.{report_id}": ""}}
 
         try:
-            ReportController.sample_handler.samples_collection().find_one_and_update(
+            ReportController.sample_handler.samples_collection().update_one(
                 ReportController.sample_handler._query_id(_id), update_instructions
             )
+            ReportController.sample_handler.forget(_id)
             cll_app.logger.info(
                 f"Report deletion for the report id {report_id} is SUCCESSFUL"
             )
@@ -535,24 +568,27 @@ class ReportController:
             cll_app.logger.error(
                 f"Report deletion for the report id {report_id} FAILED due to error {str(e)}"
             )
-            cll_app.logger.debug(
-                f"Report deletion for the report id {report_id} FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
-            )
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(
+                    f"Report deletion for the report id {report_id} FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
+                )
             return False
 
     @staticmethod
-    def delete_cll_report_local(_id: str, report_id: str) -> bool:
+    def delete_cll_report_local(_id: str, report_id: str, sample: dict | None = None) -> bool:
         """
         Delete the CLL report for a given report ID from the local file system.
 
         Args:
             _id (str): The ID of the sample.
             report_id (str): The ID of the report to delete.
+            sample (dict, optional): The already fetched sample document. Fetched if not given.
 
         Returns:
             bool: True if the report file was successfully deleted, False otherwise.
         """
-        sample = ReportController.sample_handler.get_sample(_id)
+        if sample is None:
+            sample = ReportController.sample_handler.get_sample(_id)
         report = sample.get("cll_reports").get(report_id)
 
         if report is None:
@@ -576,24 +612,30 @@ class ReportController:
             return False
 
     @staticmethod
-    def delete_cll_negative_report(_id: str) -> bool:
+    def delete_cll_negative_report(_id: str, sample: dict | None = None) -> bool:
         """
         Delete the CLL negative report for a given sample ID from both the results and the sample collection in the database.
 
         This method removes the negative report entry from the database and deletes the corresponding local file if it exists.
 
+        Args:
+            _id (str): The ID of the sample.
+            sample (dict, optional): The already fetched sample document. Fetched if not given.
+
         Returns:
             bool: True if the report was successfully deleted from the database, False otherwise.
         """
         update_instructions = {"$unset": {f"negative_report": ""}}
-        sample = ReportController.sample_handler.get_sample(_id)
+        if sample is None:
+            sample = ReportController.sample_handler.get_sample(_id)
 
         ReportController.delete_cll_negative_report_local(sample)
 
         try:
-            ReportController.sample_handler.samples_collection().find_one_and_update(
+            ReportController.sample_handler.samples_collection().update_one(
                 ReportController.sample_handler._query_id(_id), update_instructions
             )
+            ReportController.sample_handler.forget(_id)
             cll_app.logger.info(
                 f"No Results Report deletion for the report id {sample['name']} is SUCCESSFUL"
             )
@@ -602,9 +644,10 @@ class ReportController:
             cll_app.logger.error(
                 f"Report deletion for the report id {sample['name']} FAILED due to error {str(e)}"
             )
-            cll_app.logger.debug(
-                f"Report deletion for the report id {sample['name']} FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
-            )
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(
+                    f"Report deletion for the report id {sample['name']} FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
+                )
             return False
 
     @staticmethod
@@ -646,51 +689,42 @@ class ReportController:
         Update the report status field in the sample collection to True or False based on the presence of visible (not hidden) CLL reports or negative reports for the sample.
 
         If there are no visible CLL reports and no negative reports, the report status is set to False.
-        If there is at least one visible CLL report or a negative report and the report status is not already True, it is set to True.
+        If there is at least one visible CLL report or a negative report, it is set to True.
+        The counts are evaluated server-side in the same update.
 
         Returns:
-            bool: True if the report status was updated successfully or did not need updating, False otherwise.
+            bool: True if the report status was updated successfully, False otherwise.
         """
-        sample = ReportController.sample_handler.get_sample(_id)
-        reports = sample.get("cll_reports")
-        negative_reports = sample.get("negative_report")
-        neg_report_counts = unhidden_report_counts = 0
-        report_status = sample.get("report")
-
-        if reports:
-            unhidden_report_counts = len(
-                [report for report in reports if not reports[report]["hidden"]]
+        sample = ReportController.sample_handler.refresh_report_status(_id)
+        if sample is None:
+            cll_app.logger.error(
+                f"Report status update for the sample {_id} is not sucessful due to some error"
             )
+            return False
 
-        if negative_reports:
-            neg_report_counts = len(negative_reports)
+        cll_app.logger.info(
+            f"Report status updated to {sample['report']} for the sample {sample['name']}"
+        )
+        return True
 
-        if unhidden_report_counts < 1 and neg_report_counts < 1:
-            if ReportController.sample_handler.update_document(_id, "report", False):
-                cll_app.logger.info(
-                    f"Report status updated to False for the sample {sample['name']}"
-                )
-            else:
-                cll_app.logger.error(
-                    f"Report status updated to False for the sample {sample['name']} is not sucessful due to some error"
-                )
-                return False
+    @staticmethod
+    def _report_id_order(report_id: str) -> tuple:
+        """
+        Sort key ordering report IDs by submission and report number.
 
-        if unhidden_report_counts >= 1 or neg_report_counts >= 1 and not report_status:
-            if ReportController.sample_handler.update_document(_id, "report", True):
-                cll_app.logger.info(
-                    f"Report status updated to True for the sample {sample['name']}"
-                )
-            else:
-                cll_app.logger.error(
-                    f"Report status updated to True for the sample {sample['name']} is not sucessful due to some error"
-                )
-                return False
+        Args:
+            report_id (str): The report ID, e.g. "{sample_name}_{submission_num}_{report_num}".
 
-        return True
+        Returns:
+            tuple: The numeric submission and report numbers.
+        """
+        _, submission_num, report_num = report_id.rsplit("_", 2)
+        return int(submission_num), int(report_num)
 
     @staticmethod
-    def get_latest_report(_id: str, report_id: str) -> None | str:
+    def get_latest_report(
+        _id: str, report_id: str, sample: dict | None = None
+    ) -> None | str:
         """
         Get the latest report file path for a given sample and report ID.
 
@@ -702,20 +736,24 @@ class ReportController:
         Args:
             _id (str): The ID of the sample.
             report_id (str): The ID of the report to retrieve. If None or empty, the latest report is returned.
+            sample (dict, optional): The already fetched sample document. Fetched if not given.
 
         Returns:
             None | str: The absolute file path to the report if found, otherwise None.
         """
-        report_docs = ReportController.sample_handler.get_cll_reports(_id)
-        neg_report_docs = ReportController.sample_handler.get_negative_report(_id)
+        if sample is None:
+            sample = ReportController.sample_handler.get_sample(_id)
+        report_docs = sample.get("cll_reports", {})
+        neg_report_docs = sample.get("negative_report", None)
         unhidden_reports_ids = [
-            report for report in report_docs.keys() if not report_docs[report]["hidden"]
+            report for report, report_doc in report_docs.items() if not report_doc["hidden"]
         ]
-        unhidden_reports_ids.sort()
 
         if unhidden_reports_ids:
             if report_id is None or report_id == "":
-                report_id_show = unhidden_reports_ids[-1]
+                report_id_show = max(
+                    unhidden_reports_ids, key=ReportController._report_id_order
+                )
             elif (
                 report_id is not None
                 or report_id != ""
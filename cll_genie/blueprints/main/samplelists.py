@@ -1,5 +1,5 @@
 from typing import List, Optional, Dict
-from copy import deepcopy
+from collections import defaultdict
 import pymongo  # type: ignore
 from cll_genie.extensions import sample_handler
 from flask import current_app as cll_app
@@ -14,6 +14,9 @@ class SampleListController:
     """
     sample_handler = sample_handler
 
+    # Fields shown for duplicated samples on the home page
+    DUPLICATE_SAMPLE_FIELDS = {"name": 1, "date_added": 1, "clarity_id": 1, "assay": 1}
+
     @staticmethod
     def get_unanalyzed_sample_list(
         query: Optional[dict] = None, n_skip: int = 0, page_size: int = 0
@@ -33,7 +36,7 @@ class SampleListController:
         if query is None:
             query = {}
         else:
-            query = deepcopy(query)
+            query = dict(query)
 
         query["report"] = False
 
@@ -41,17 +44,16 @@ class SampleListController:
             query, n_skip=n_skip, page_size=page_size
         )
 
-        sample_false_count = SampleListController.get_sample_list(query)
+        sample_false_count = SampleListController.sample_handler.count_samples(query)
 
-        duplicate_count = [
-            SampleListController._get_duplicated_samples(sample["name"])
-            for sample in samples_false
-        ]
+        duplicates = SampleListController._get_duplicated_samples(
+            [sample["name"] for sample in samples_false]
+        )
 
-        for sample, count in zip(samples_false, duplicate_count):
-            sample["samples_with_same_sample_id"] = count
+        for sample in samples_false:
+            sample["samples_with_same_sample_id"] = duplicates.get(sample["name"])
 
-        return samples_false, len(sample_false_count)
+        return samples_false, sample_false_count
 
     @staticmethod
     def get_sample_list(
@@ -71,7 +73,7 @@ class SampleListController:
         if query is None:
             query = {}
         else:
-            query = deepcopy(query)
+            query = dict(query)
 
         cll_app.logger.debug(query)
         samples = (
@@ -81,24 +83,38 @@ class SampleListController:
             .skip(n_skip)
             .limit(page_size)
         )
+        if page_size > 0:
+            # Fetch the whole page in the first batch, without getMore round trips
+            samples = samples.batch_size(page_size)
         samples = list(samples)
         return samples
 
     @staticmethod
-    def _get_duplicated_samples(sample_id: str) -> Optional[List[dict]]:
+    def _get_duplicated_samples(sample_ids: List[str]) -> Dict[str, List[dict]]:
         """
-        Detect and return a list of samples sharing the same sample ID.
+        Detect samples sharing the same sample ID, for several sample IDs in one query.
 
         Args:
-            sample_id (str): The sample ID to check for duplicates.
+            sample_ids (List[str]): The sample IDs to check for duplicates.
 
         Returns:
-            Optional[List[dict]]: A list of duplicate samples, or None if no duplicates are found.
+            Dict[str, List[dict]]: The duplicate samples keyed by sample ID. Sample IDs
+            without duplicates are left out.
         """
-        results = SampleListController.sample_handler.get_samples({"name": sample_id})
-        results = list(results)
+        if not sample_ids:
+            return {}
+
+        results = SampleListController.sample_handler.get_samples(
+            {"name": {"$in": list(set(sample_ids))}},
+            projection=SampleListController.DUPLICATE_SAMPLE_FIELDS,
+        )
 
-        if len(results) < 2:
-            return None
+        samples_by_id = defaultdict(list)
+        for result in results:
+            samples_by_id[result["name"]].append(result)
 
-        return results
+        return {
+            sample_id: samples
+            for sample_id, samples in samples_by_id.items()
+            if len(samples) >= 2
+        }
@@ -3,40 +3,41 @@ Misc standalone utilities.
 """
 
 import csv
+import re
+from itertools import islice
 from io import BytesIO, StringIO
 from zipfile import ZipFile
 from flask import current_app as cll_genie
-from copy import deepcopy
 import base64
+import os
+from functools import lru_cache
 
 
 def add_search_query(query: dict, search_string: str) -> dict:
     """
-    Detect and return a list of samples sharing the same sample ID.
+    Add a sample name search to a query.
+
+    Every whitespace-separated word in the search string must match the sample name.
+    Words in double quotes must match exactly, other words match anywhere in the name.
 
     Args:
-        sample_id (str): The sample ID to check for duplicates.
+        query (dict): The query to extend. It is not modified.
+        search_string (str): The search string entered by the user.
 
     Returns:
-        Optional[List[dict]]: A list of duplicate samples, or None if no duplicates are found.
+        dict: A copy of the query with the name search added.
     """
-    query = deepcopy(query)  # No editing in place >:(
-
-    parts = search_string.split()
-    query["$and"] = []
-    for part in parts:
-        if part[0] == '"' and part[-1] == '"':
-            part = part[1:-1]
-            query["$and"].append(
-                {
-                    "$or": [
-                        {"name": part},
-                    ]
-                }
-            )
-        else:
-            query["$and"].append({"$or": [{"name": {"$regex": part}}]})
-
+    # No editing in place >:(
+    # Shallow copy: only "$and" is replaced, nested values stay shared with the caller.
+    query = dict(query)
+    query["$and"] = [
+        (
+            {"$or": [{"name": part[1:-1]}]}
+            if len(part) >= 2 and part[0] == part[-1] == '"'
+            else {"$or": [{"name": {"$regex": re.escape(part)}}]}
+        )
+        for part in search_string.split()
+    ]
     return query
 
 
@@ -54,19 +55,11 @@ def chunker(iterator, chunksize):
     Yields:
         list: A list containing the items in the current chunk.
     """
-    # inspired by https://stackoverflow.com/a/8991553/4499968
-    chunk = []
-    try:
-        for item in iterator:
-            chunk.append(item)
-            if len(chunk) == chunksize:
-                yield chunk
-                chunk = []
-    except StopIteration:
-        pass
-    # If the last chunk has items, yield that, but don't just yield an empty
-    # list.
-    if chunk:
+    it = iter(iterator)
+    while True:
+        chunk = list(islice(it, chunksize))
+        if not chunk:
+            return
         yield chunk
 
 
@@ -110,22 +103,33 @@ def airr_to_fasta(
     Returns:
         str: The converted FASTA format as a string.
     """
-    reader = csv.DictReader(StringIO(airr_txt), delimiter="\t")
-    fasta = ""
+    reader = csv.reader(StringIO(airr_txt), delimiter="\t")
+    header = next(reader, None)
+    if header is None:
+        return ""
+
+    id_idx = header.index(seqid_col)
+    aln_idx = header.index(aln_col)
+    fb_idx = header.index(fallback_col) if fallback_col else None
+
+    fasta = []
+    append = fasta.append
     for row in reader:
-        seq = row[aln_col]
-        if fallback_col:
-            seq = seq or row[fallback_col]
-        fasta += ">%s\n%s\n" % (row[seqid_col], seq)
-    return fasta
+        seq = row[aln_idx]
+        if fb_idx is not None:
+            seq = seq or row[fb_idx]
+        append(f">{row[id_idx]}\n{seq}\n")
+    return "".join(fasta)
 
 
-def create_base64_logo(logo_path):
+@lru_cache(maxsize=16)
+def _encode_logo(logo_path, mtime):
     """
-    Create a base64-encoded string representation of an image file.
+    Base64-encode an image file, cached per path and modification time.
 
     Args:
         logo_path (str): The path to the image file.
+        mtime (float): The modification time of the file, so an updated file is re-read.
 
     Returns:
         str: The base64-encoded string of the image.
@@ -135,6 +139,21 @@ def create_base64_logo(logo_path):
     return encoded_string.decode("utf-8")
 
 
+def create_base64_logo(logo_path):
+    """
+    Create a base64-encoded string representation of an image file.
+
+    The encoded image is cached until the file changes on disk.
+
+    Args:
+        logo_path (str): The path to the image file.
+
+    Returns:
+        str: The base64-encoded string of the image.
+    """
+    return _encode_logo(logo_path, os.path.getmtime(logo_path))
+
+
 class VquestError(Exception):
     """
     Vquest-related errors.
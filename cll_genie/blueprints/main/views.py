@@ -75,13 +75,14 @@ def download_excel(id):
     Returns:
         Response: The Excel file as an attachment, or an error page if the file cannot be found or accessed.
     """
-    sample_id = SampleListController.sample_handler.get_sample_name(id)
     excel_file = os.path.abspath(
         SampleListController.sample_handler.get_lymphotrack_excel(id)
     )
     try:
         return send_file(excel_file, as_attachment=True)
     except Exception as e:
+        # The sample name is only needed for the error page
+        sample_id = SampleListController.sample_handler.get_sample_name(id)
         return render_template(
             "errors.html",
             errors=[
@@ -108,13 +109,14 @@ def download_qc_file(id):
     Returns:
         Response: The QC file as an attachment, or an error page if the file cannot be found or accessed.
     """
-    sample_id = SampleListController.sample_handler.get_sample_name(id)
     qc_file = os.path.abspath(
         SampleListController.sample_handler.get_lymphotrack_qc(id)
     )
     try:
         return send_file(qc_file, as_attachment=True)
     except Exception as e:
+        # The sample name is only needed for the error page
+        sample_id = SampleListController.sample_handler.get_sample_name(id)
         return render_template(
             "errors.html",
             errors=[
@@ -142,7 +144,6 @@ def download_results(filetype: str, id: str):
     Returns:
         Response: The requested results file as an attachment, or an error page if the file cannot be found or accessed.
     """
-    sample_id = SampleListController.sample_handler.get_sample_name(id)
     submission_id = request.args.get("sub_id")
     submission_results = ResultsController.results_handler.get_submission_results(
         id, submission_id
@@ -165,6 +166,8 @@ def download_results(filetype: str, id: str):
         )
         return response
     except Exception as e:
+        # The sample name is only needed for the error page
+        sample_id = SampleListController.sample_handler.get_sample_name(id)
         return render_template(
             "errors.html",
             errors=[
@@ -218,14 +221,13 @@ def sample(sample_id: str):
             sample["q30_bases"] = int(qc_values["countQ30"])
             sample["q30_per"] = round(float(qc_values["indexQ30"].replace(",", ".")), 2)
 
-            SampleListController.sample_handler.update_document(
-                _id, "total_bases", sample["total_bases"]
-            )
-            SampleListController.sample_handler.update_document(
-                _id, "q30_bases", sample["q30_bases"]
-            )
-            SampleListController.sample_handler.update_document(
-                _id, "q30_per", sample["q30_per"]
+            SampleListController.sample_handler.update_fields(
+                _id,
+                {
+                    "total_bases": sample["total_bases"],
+                    "q30_bases": sample["q30_bases"],
+                    "q30_per": sample["q30_per"],
+                },
             )
             cll_app.logger.info(f"QC data updated for the sample: {sample_id}")
         except:
@@ -501,26 +503,22 @@ def vquest_results(sample_id: str):
 
         # merged vquest results to insert into the database
         if not errors and vquest_results_raw is not None:
-            for seq_id in vquest_results_raw[sample_id].keys():
+            for seq_id, seq_results in vquest_results_raw[sample_id].items():
                 if (
                     seq_id != "parameters"
                     and selected_sequences_merging_rate is not None
                 ):
-                    vquest_results_raw[sample_id][seq_id]["summary"]["Merge Count"] = (
-                        int(selected_sequences_merging_rate[seq_id][0])
+                    seq_summary = seq_results["summary"]
+                    seq_merging_rate = selected_sequences_merging_rate[seq_id]
+                    seq_summary["Merge Count"] = int(seq_merging_rate[0])
+                    seq_summary["Total Reads Per"] = round(
+                        float(seq_merging_rate[1]), 2
                     )
-                    vquest_results_raw[sample_id][seq_id]["summary"][
-                        "Total Reads Per"
-                    ] = round(float(selected_sequences_merging_rate[seq_id][1]), 2)
-                    vquest_results_raw[sample_id][seq_id]["summary"]["Inframe"] = (
-                        True
-                        if selected_sequences_merging_rate[seq_id][2] == "Y"
-                        else False
+                    seq_summary["Inframe"] = (
+                        True if seq_merging_rate[2] == "Y" else False
                     )
-                    vquest_results_raw[sample_id][seq_id]["summary"]["Stop Codon"] = (
-                        False
-                        if selected_sequences_merging_rate[seq_id][3].strip("/") == "Y"
-                        else True
+                    seq_summary["Stop Codon"] = (
+                        False if seq_merging_rate[3].strip("/") == "Y" else True
                     )
 
             if ResultsController.save_results_to_db(
@@ -737,10 +735,6 @@ def cll_report(sample_id: str):
         html_file_name = os.path.basename(html_file_path)
         report_id = html_file_name.replace(".html", "")
 
-        report_docs = ReportController.sample_handler.get_cll_reports(
-            _id
-        )  # for sample collections
-
         report_date = datetime.now()
 
         # To show a preview sign in the report
@@ -772,19 +766,21 @@ def cll_report(sample_id: str):
                 with open(html_file_path, "w") as html_out:
                     html_out.write(html)
 
-                report_docs[report_id] = {}
-                report_docs[report_id]["path"] = html_file_path
-                report_docs[report_id]["date_created"] = report_date
-                report_docs[report_id]["submission_id"] = submission_id
-                report_docs[report_id]["created_by"] = current_user.get_fullname()
-                report_docs[report_id]["hidden"] = False
-                report_docs[report_id]["hidden_by"] = None
-                report_docs[report_id]["time_hidden"] = None
-                report_docs[report_id]["summary"] = report_summary
-                ReportController.sample_handler.update_document(_id, "report", True)
-                ReportController.sample_handler.update_document(
-                    _id, "cll_reports", report_docs
+                report_doc = {
+                    "path": html_file_path,
+                    "date_created": report_date,
+                    "submission_id": submission_id,
+                    "created_by": current_user.get_fullname(),
+                    "hidden": False,
+                    "hidden_by": None,
+                    "time_hidden": None,
+                    "summary": report_summary,
+                }
+                # Only the new report is sent, not the sample's whole cll_reports map
+                ReportController.sample_handler.update_fields(
+                    _id, {"report": True, f"cll_reports.{report_id}": report_doc}
                 )
+                ReportController.record_submission_report(_id, report_id)
 
                 if len(report_summary) > 0:
                     new_comment = comment_dict(report_summary)
@@ -878,13 +874,14 @@ def negative_report(sample_id: str):
                 "created_by": current_user.get_fullname(),
             }
 
-            ReportController.sample_handler.update_document(
-                _id, "negative_report", update_neg_report
-            )
-            SampleListController.sample_handler.update_document(
-                _id, "is_eligible_for_vquest", False
+            ReportController.sample_handler.update_fields(
+                _id,
+                {
+                    "negative_report": update_neg_report,
+                    "is_eligible_for_vquest": False,
+                    "report": True,
+                },
             )
-            ReportController.sample_handler.update_document(_id, "report", True)
             flash(
                 f"Report with id: {report_id} save to the disk and added to the database",
                 "success",
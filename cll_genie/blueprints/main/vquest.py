@@ -1,13 +1,31 @@
 from pathlib import Path
 import requests
-from requests_html import HTML
-from zipfile import ZipFile
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from zipfile import BadZipFile, ZipFile
 from flask import current_app as cll_app
-from copy import deepcopy
 import pandas as pd
-import io
 import re
 import os
+import csv
+from typing import Iterable
+from html import unescape
+
+# Error messages in the V-QUEST HTML error page
+_ERR_UL = re.compile(r'<ul\s+class="errorMessage">\s*(.*?)\s*</ul>', re.DOTALL)
+_ERR_SPAN = re.compile(r"<span>(.*?)</span>", re.DOTALL)
+_ERR_FORM = re.compile(
+    r'<div[^>]*class="[^"]*\bform_error\b[^"]*"[^>]*>(.*?)</div>', re.DOTALL
+)
+_TAG = re.compile(r"<[^>]+>")
+
+# Shared HTTP session, so connections to V-QUEST are reused between submissions.
+# Only failed connection attempts are retried; a POST that reached the server is not resent.
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(max_retries=Retry(total=3, read=0, status=0, backoff_factor=0.3)),
+)
 
 
 class VQuest:
@@ -20,6 +38,20 @@ class VQuest:
     """
 
     URL = cll_app.config["VQUEST_URL"]
+    TIMEOUT = cll_app.config["VQUEST_TIMEOUT"]
+    CHUNK_SIZE = 64 * 1024
+    HEADERS = {
+        "Referer": f"{URL}.html",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    }
+
+    # Form values converted by process_config
+    _BOOL_TRUE = frozenset(["True", "true"])
+    _BOOL_FALSE = frozenset(["False", "false"])
+    _NULL = frozenset(["None", "null"])
+
+    # Run-specific lines left out of the stored V-QUEST parameters
+    _SKIP_PARAMETERS = frozenset(["Date"])
 
     def __init__(
         self,
@@ -39,12 +71,9 @@ class VQuest:
         """
         self.sample_id = sample_id
         self.payload = config
-        self.output_dir = Path(
-            os.path.join(output_dir, sample_id, submission_id, "vquest")
-        )
-        self.vquest_results_file = os.path.join(
-            self.output_dir, f"{self.sample_id}.zip"
-        )
+        self.output_dir = Path(output_dir, sample_id, submission_id, "vquest")
+        # Kept as a string, the path is stored in the results document
+        self.vquest_results_file = str(self.output_dir / f"{self.sample_id}.zip")
         self.remove_files(self.vquest_results_file)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -90,14 +119,16 @@ class VQuest:
                 # Process results
         """
 
-        headers = {
-            "Referer": f"{VQuest.URL}.html",
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
-        }
-
         errors = []
+        response = None
         try:
-            response = requests.post(VQuest.URL, data=self.payload, headers=headers)
+            response = _session.post(
+                VQuest.URL,
+                data=self.payload,
+                headers=VQuest.HEADERS,
+                timeout=VQuest.TIMEOUT,
+                stream=True,
+            )
             cll_app.logger.info(f"{response}")
             cll_app.logger.debug(f"payload: {self.payload}")
             ctype = response.headers.get("Content-Type")
@@ -125,46 +156,57 @@ class VQuest:
 
                 cll_app.logger.info(f"\n{html}\n")
 
-                # Match elements with class="error" or class="error-message" within other tags
-                pattern = r'<ul\s+class="errorMessage">\s*(.*?)\s*</ul>'
-                matches = re.findall(pattern, html, re.DOTALL)
-                if matches:
-                    errors.extend(re.findall(r"<span>(.*?)</span>", matches[0]))
+                # Match elements with class="errorMessage" or class="form_error"
+                match = _ERR_UL.search(html)
+                if match:
+                    errors.extend(_ERR_SPAN.findall(match.group(1)))
 
-                try:
-                    for div in HTML(html).find("div.form_error"):
-                        errors.append(div.text)
-                except:
-                    pass
+                for div in _ERR_FORM.findall(html):
+                    errors.append(unescape(_TAG.sub("", div)).strip())
         except requests.exceptions.ConnectionError as e:
             errors.append(
                 "Request failed with error 'Failed to establish a new connection'"
             )
+        except requests.exceptions.Timeout:
+            errors.append("Request failed with error 'V-QUEST did not respond in time'")
 
         if errors:
             for error in errors:
                 cll_app.logger.error(error)
 
+            if response is not None:
+                response.close()
             return None, errors
         else:
             try:
-                self.save_zip_content(response.content)
+                self.save_zip_content(
+                    response.iter_content(chunk_size=VQuest.CHUNK_SIZE)
+                )
                 return self.process_zip_results_for_report(), None
             except FileNotFoundError:
                 cll_app.logger.error("File not found on the server")
                 return None, "File not found on the server"
+            except (requests.exceptions.RequestException, BadZipFile) as e:
+                # The body is streamed here, so a dropped connection or a truncated
+                # archive only shows up while saving it
+                Path(self.vquest_results_file).unlink(missing_ok=True)
+                error = f"Downloading the V-QUEST results failed with error '{str(e)}'"
+                cll_app.logger.error(error)
+                return None, [error]
+            finally:
+                response.close()
 
-    def save_zip_content(self, zip_data) -> None:
+    def save_zip_content(self, zip_chunks: Iterable[bytes]) -> None:
         """
         Save and extract the content of a ZIP file from the V-QUEST response.
 
-        This method takes the binary content of a ZIP file returned by the V-QUEST service,
-        writes it to a ZIP archive on disk, and extracts all files within the archive to the
-        specified output directory. Each file is both written to the output ZIP and extracted
-        individually for further processing.
+        This method streams the binary content of a ZIP file returned by the V-QUEST service
+        chunk by chunk to disk, unchanged, and extracts all files within the archive to the
+        specified output directory for further processing.
 
         Args:
-            zip_data (bytes): The binary content of the ZIP file received from the V-QUEST response.
+            zip_chunks (Iterable[bytes]): The binary content of the ZIP file received from the
+                V-QUEST response, in chunks.
 
         Side Effects:
             - Creates or overwrites the ZIP file at `self.vquest_results_file`.
@@ -176,20 +218,14 @@ class VQuest:
             OSError: If there are issues writing files to disk.
 
         Example:
-            self.save_zip_content(response.content)
+            self.save_zip_content(response.iter_content(chunk_size=VQuest.CHUNK_SIZE))
         """
-        # create a binary stream from the response content
-        stream = io.BytesIO(zip_data)
-
-        # extract the files from the stream and save them to disk
-        with ZipFile(stream, "r") as zip_file:
-            with ZipFile(self.vquest_results_file, "w") as output_zip:
-                for member_name in zip_file.namelist():
-                    member_content = zip_file.read(member_name)
-                    output_zip.writestr(member_name, member_content)
-                    output_file = Path(os.path.join(self.output_dir, member_name))
-                    with output_file.open("wb") as f:
-                        f.write(member_content)
+        with open(self.vquest_results_file, "wb") as f:
+            for chunk in zip_chunks:
+                f.write(chunk)
+
+        with ZipFile(self.vquest_results_file, "r") as zip_file:
+            zip_file.extractall(self.output_dir)
 
     def process_zip_results_for_report(self) -> dict:
         """
@@ -210,49 +246,45 @@ class VQuest:
 
         Side Effects:
             - Reads files from the output directory specified by `self.output_dir`.
-            - Calls static method `replace_empty_with_none` to clean up empty values in the results.
+            - Missing values in the results are stored as None.
 
         Example:
             results = self.process_zip_results_for_report()
         """
-        parameter_dict = {}
-        with open(os.path.join(self.output_dir, "11_Parameters.txt"), "r") as f:
-            for line in f:
-                parts = line.strip().split("\t")
-                if parts[0] == "Date" or parts[0].startswith("Nb of nucleotides"):
-                    continue
-                else:
-                    parameter_dict[parts[0]] = parts[1]
+        with open(self.output_dir / "11_Parameters.txt", "r", newline="") as f:
+            parameter_dict = {
+                row[0].strip(): row[1].strip()
+                for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+                if len(row) >= 2
+                and row[0].strip() not in VQuest._SKIP_PARAMETERS
+                and not row[0].strip().startswith("Nb of nucleotides")
+            }
 
         # processing Summary from the results
         summary_raw_df = pd.read_csv(
-            os.path.join(self.output_dir, "1_Summary.txt"), sep="\t", header=0
+            self.output_dir / "1_Summary.txt",
+            sep="\t",
+            header=0,
+            engine="c",
+            usecols=VQuest.named_column,
         )
-        summary_raw_df = summary_raw_df.loc[
-            :, ~summary_raw_df.columns.str.contains("^Unnamed")
-        ]
-        summary_raw_df.fillna("", inplace=True)
-        summary_raw_dict = (
-            summary_raw_df.groupby("Sequence ID")
-            .apply(lambda x: x.set_index("Sequence ID").to_dict("records")[0])
-            .to_dict()
+        summary_raw_df = summary_raw_df.astype(object).where(
+            summary_raw_df.notna(), None
         )
-        VQuest.replace_empty_with_none(summary_raw_dict)
+        summary_raw_dict = VQuest.records_by_sequence_id(summary_raw_df)
 
         # Processing Junction results
         junction_raw_df = pd.read_csv(
-            os.path.join(self.output_dir, "6_Junction.txt"), sep="\t", header=0
+            self.output_dir / "6_Junction.txt",
+            sep="\t",
+            header=0,
+            engine="c",
+            usecols=VQuest.named_column,
         )
-        junction_raw_df = junction_raw_df.loc[
-            :, ~junction_raw_df.columns.str.contains("^Unnamed")
-        ]
-        junction_raw_df.fillna("", inplace=True)
-        junction_raw_dict = (
-            junction_raw_df.groupby("Sequence ID")
-            .apply(lambda x: x.set_index("Sequence ID").to_dict("records")[0])
-            .to_dict()
+        junction_raw_df = junction_raw_df.astype(object).where(
+            junction_raw_df.notna(), None
         )
-        VQuest.replace_empty_with_none(junction_raw_dict)
+        junction_raw_dict = VQuest.records_by_sequence_id(junction_raw_df)
 
         merged_dict_raw = self.create_dict_for_mongo(
             summary_raw_dict, junction_raw_dict, parameter_dict
@@ -260,18 +292,41 @@ class VQuest:
         return merged_dict_raw
 
     @staticmethod
-    def replace_empty_with_none(d):
+    def named_column(column: str) -> bool:
         """
-        Replace empty string values in a dictionary with None.
+        Tell whether a V-QUEST result column should be read.
+
+        Columns without a header name, e.g. from a trailing tab, show up as "Unnamed: N".
 
         Args:
-            d (dict): The dictionary to process.
+            column (str): The column name from the header.
+
+        Returns:
+            bool: False for empty and unnamed columns, True otherwise.
+        """
+        return bool(column) and not column.startswith("Unnamed")
+
+    @staticmethod
+    def records_by_sequence_id(df: pd.DataFrame) -> dict:
+        """
+        Convert a V-QUEST result table into one record per sequence, keyed by sequence ID.
+
+        Like grouping by "Sequence ID", the records are ordered by sequence ID, only the
+        first row of a repeated ID is kept and rows without an ID are dropped.
+
+        Args:
+            df (pd.DataFrame): The result table with a "Sequence ID" column.
+
+        Returns:
+            dict: The row records, without the "Sequence ID" field, keyed by sequence ID.
         """
-        for k, v in d.items():
-            if isinstance(v, dict):
-                VQuest.replace_empty_with_none(v)
-            elif v == "":
-                d[k] = None
+        records = (
+            df.dropna(subset=["Sequence ID"])
+            .drop_duplicates("Sequence ID")
+            .sort_values("Sequence ID", kind="stable")
+            .to_dict("records")
+        )
+        return {record.pop("Sequence ID"): record for record in records}
 
     def create_dict_for_mongo(self, s_dict, j_dict, p_dict):
         """
@@ -287,11 +342,9 @@ class VQuest:
         """
         results_dict = {self.sample_id: {"parameters": p_dict}}
 
-        seq_ids = s_dict.keys()
-
-        for seq_id in seq_ids:
+        for seq_id, seq_summary in s_dict.items():
             results_dict[self.sample_id][seq_id] = {
-                "summary": s_dict[seq_id],
+                "summary": seq_summary,
                 "junction": j_dict[seq_id],
             }
 
@@ -308,13 +361,15 @@ class VQuest:
         Returns:
             dict: The processed configuration dictionary.
         """
-        vquest_payload = deepcopy(config_dict)
-        for key, value in vquest_payload.items():
-            if value == "True" or value == "true":
+        vquest_payload = {}
+        for key, value in config_dict.items():
+            if not isinstance(value, str):
+                vquest_payload[key] = value
+            elif value in VQuest._BOOL_TRUE:
                 vquest_payload[key] = True
-            elif value == "False" or value == "false":
+            elif value in VQuest._BOOL_FALSE:
                 vquest_payload[key] = False
-            elif value == "None" or value == "null":
+            elif value in VQuest._NULL:
                 vquest_payload[key] = None
             elif value.isdigit() or (
                 value.startswith("-") and value[1:].isdigit()
@@ -323,7 +378,7 @@ class VQuest:
             elif value.startswith(">Seq"):
                 vquest_payload[key] = value.replace("\r", "")
             else:
-                pass
+                vquest_payload[key] = value
         return vquest_payload
 
 
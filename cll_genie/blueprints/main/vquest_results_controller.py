@@ -54,7 +54,7 @@ class ResultsController:
             "submission_comments": None,
         }
 
-        if int(submission_id.split("_")[-1]) == 1:
+        if int(submission_id.rsplit("_", 1)[-1]) == 1:
             results = {submission_id: _doc}
             query_insert = {
                 "_id": ObjectId(_id),
@@ -75,10 +75,9 @@ class ResultsController:
                 cll_app.logger.error(f"Insertion failed with exception: {e}")
                 status = False
         else:
-            results = ResultsController.results_handler.get_results(_id)["results"]
-            results[submission_id] = _doc
+            # Only the new submission is sent, not the whole results map
             return ResultsController.results_handler.update_document(
-                _id, "results", results
+                _id, f"results.{submission_id}", _doc
             )
 
         if status:
@@ -212,8 +211,9 @@ class ResultsController:
                 ResultsController.results_handler.delete_document(_id)
 
             if cll_submission_reports:
+                sample = ResultsController.sample_handler.get_sample(_id)
                 for report_id in cll_submission_reports:
-                    ReportController.delete_cll_report_local(_id, report_id)
+                    ReportController.delete_cll_report_local(_id, report_id, sample)
                     ReportController.delete_cll_report(_id, report_id)
             return True
         except PyMongoError as e:
@@ -1,11 +1,40 @@
 from flask import current_app as cll_app
+from flask import g, has_request_context
 import pymongo  # type: ignore
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
 from bson.objectid import ObjectId  # type: ignore
 from typing import Dict, Any, Optional
 from pprint import pformat
-from copy import deepcopy
-from datetime import datetime
+from datetime import datetime, timezone
+import logging
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _object_id(_id: str) -> ObjectId:
+    """
+    Parse a sample id into an ObjectId.
+
+    Memoized, since a single request looks up the same sample several times.
+
+    Args:
+        _id (str): The string representation of the ObjectId.
+
+    Returns:
+        ObjectId: The parsed ObjectId.
+    """
+    return ObjectId(_id)
+
+
+# Sample collections whose indexes were already ensured by this process
+_indexes_ensured = set()
+
+# Sample fields that can grow large; scalar getters are served without them
+_HEAVY_FIELDS = ("cll_reports",)
+
+# Status fields polled by the sample pages, kept in the app cache for a few seconds
+_STATUS_FIELDS = ("vquest", "report", "q30_per")
 
 
 class SampleHandler:
@@ -28,6 +57,7 @@ class SampleHandler:
         self.mongo_client = None
         self.db = None
         self.collection = None
+        self._collection = None
 
     def initialize(
         self, mongo_client: pymongo.MongoClient, db_name: str, collection_name: str
@@ -43,15 +73,35 @@ class SampleHandler:
         self.mongo_client: pymongo.MongoClient = mongo_client
         self.db = db_name
         self.collection = collection_name
+        self._collection = mongo_client[db_name][collection_name]
 
-    def samples_collection(self) -> pymongo.MongoClient:
+    def samples_collection(self) -> pymongo.collection.Collection:
         """
         Get the MongoDB collection for samples.
 
         Returns:
-            pymongo.MongoClient: The MongoDB collection instance.
+            pymongo.collection.Collection: The collection handle cached by initialize.
+        """
+        return self._collection
+
+    def ensure_indexes(self) -> None:
+        """
+        Create the indexes used by the sample list queries, if they do not exist yet.
+
+        The compound index covers the report filter together with the list sort order,
+        and the name index serves the duplicate sample lookups.
         """
-        return self.mongo_client[self.db][self.collection]
+        collection_key = (self.db, self.collection)
+        if collection_key in _indexes_ensured:
+            return
+        try:
+            self.samples_collection().create_index(
+                [("report", 1), ("date_added", -1), ("name", 1)], background=True
+            )
+            self.samples_collection().create_index("name", background=True)
+            _indexes_ensured.add(collection_key)
+        except PyMongoError as e:
+            cll_app.logger.error(f"Creating sample indexes FAILED due to error {str(e)}")
 
     @staticmethod
     def _query_id(_id: str) -> Dict[str, ObjectId]:
@@ -64,20 +114,173 @@ class SampleHandler:
         Returns:
             dict: A dictionary with the ObjectId query.
         """
-        return {"_id": ObjectId(_id)}
+        return {"_id": _object_id(_id)}
 
-    def get_sample(self, _id: str) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _request_cache() -> dict | None:
+        """
+        Get the per-request cache of fetched sample documents.
+
+        Returns:
+            dict or None: Cached documents keyed by ID, or None outside a request.
+        """
+        if not has_request_context():
+            return None
+        if "sample_cache" not in g:
+            g.sample_cache = {}
+        return g.sample_cache
+
+    def forget(self, _id: str) -> None:
+        """
+        Drop a sample document from the per-request cache after it has been written.
+
+        Called once the write has completed, so a concurrent read cannot cache the old
+        status values again between the invalidation and the write.
+
+        Args:
+            _id (str): The ID of the sample.
+        """
+        cache = SampleHandler._request_cache()
+        if cache is not None:
+            cache.pop(str(_id), None)
+            cache.pop((str(_id), "lean"), None)
+
+        from cll_genie.extensions import cache as app_cache
+
+        app_cache.delete_many(
+            *(SampleHandler._status_cache_key(_id, field) for field in _STATUS_FIELDS)
+        )
+
+    def get_sample(
+        self, _id: str, projection: Optional[dict] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Retrieve a sample document by its ID.
 
+        This always reads from the database. A whole document read also refreshes the
+        per-request cache used by get_sample_cached.
+
         Args:
             _id (str): The ID of the sample.
+            projection (dict, optional): The fields to return. Defaults to the whole document.
 
         Returns:
             dict or None: The sample document if found, otherwise None.
         """
+        if not ObjectId.is_valid(_id):
+            return None
         query = SampleHandler._query_id(_id)
-        return self.samples_collection().find_one(query)
+        sample = self.samples_collection().find_one(query, projection)
+
+        cache = SampleHandler._request_cache()
+        if cache is not None and projection is None and sample is not None:
+            cache[str(_id)] = sample
+
+        return sample
+
+    def get_sample_cached(self, _id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a sample document by its ID, fetching it at most once per request.
+
+        Args:
+            _id (str): The ID of the sample.
+
+        Returns:
+            dict or None: The sample document if found, otherwise None.
+        """
+        cache = SampleHandler._request_cache()
+        if cache is not None and str(_id) in cache:
+            return cache[str(_id)]
+        return self.get_sample(_id)
+
+    def get_fields(self, _id: str, fields: list[str]) -> Dict[str, Any]:
+        """
+        Read several top-level fields of a sample in one round-trip.
+
+        Within a request the sample is fetched once and shared by all getters. Until a
+        getter needs one of the heavy fields (the stored reports), the shared copy is
+        fetched without them. Outside a request only the requested fields are fetched.
+
+        Args:
+            _id (str): The ID of the sample.
+            fields (list[str]): The fields to read.
+
+        Returns:
+            dict: The fields present on the sample, keyed by name.
+        """
+        cache = SampleHandler._request_cache()
+        if cache is not None:
+            sample = cache.get(str(_id))
+            if sample is None and not any(field in _HEAVY_FIELDS for field in fields):
+                lean_key = (str(_id), "lean")
+                if lean_key not in cache:
+                    cache[lean_key] = self.get_sample(
+                        _id, dict.fromkeys(_HEAVY_FIELDS, 0)
+                    )
+                sample = cache[lean_key]
+            elif sample is None:
+                sample = self.get_sample_cached(_id)
+            if sample is None:
+                return {}
+            return {field: sample[field] for field in fields if field in sample}
+        projection = dict.fromkeys(fields, 1)
+        projection.setdefault("_id", 0)
+        return self.get_sample(_id, projection) or {}
+
+    def _get_field(self, _id: str, field: str, default: Any = None) -> Any:
+        """
+        Read a single top-level field of a sample.
+
+        Args:
+            _id (str): The ID of the sample.
+            field (str): The field to read.
+            default (Any, optional): The value returned if the field is missing. Defaults to None.
+
+        Returns:
+            Any: The value of the field.
+        """
+        return self.get_fields(_id, [field]).get(field, default)
+
+    @staticmethod
+    def _status_cache_key(_id: str, field: str) -> str:
+        """
+        Build the app cache key of a sample status field.
+
+        Args:
+            _id (str): The ID of the sample.
+            field (str): The status field.
+
+        Returns:
+            str: The cache key.
+        """
+        return f"sample_status/{_id}/{field}"
+
+    def _get_status_field(self, _id: str, field: str) -> Any:
+        """
+        Read a status field of a sample through the app cache.
+
+        Entries expire after SAMPLE_STATUS_CACHE_TIMEOUT seconds and are dropped by
+        forget when this process writes the sample, so other workers see changes
+        within that time.
+
+        Args:
+            _id (str): The ID of the sample.
+            field (str): The status field to read.
+
+        Returns:
+            Any: The value of the field.
+        """
+        from cll_genie.extensions import cache as app_cache
+
+        key = SampleHandler._status_cache_key(_id, field)
+        value = app_cache.get(key)
+        if value is None:
+            value = self._get_field(_id, field)
+            if value is not None:
+                app_cache.set(
+                    key, value, timeout=cll_app.config["SAMPLE_STATUS_CACHE_TIMEOUT"]
+                )
+        return value
 
     def sample_exists(self, _id: str) -> bool:
         """
@@ -89,21 +292,50 @@ class SampleHandler:
         Returns:
             bool: True if the sample exists, False otherwise.
         """
-        return bool(self.get_sample(_id))
+        cache = SampleHandler._request_cache()
+        if cache is not None and (
+            str(_id) in cache or cache.get((str(_id), "lean")) is not None
+        ):
+            return True
+        if not ObjectId.is_valid(_id):
+            return False
+        return (
+            self.samples_collection().count_documents(
+                SampleHandler._query_id(_id), limit=1
+            )
+            == 1
+        )
 
-    def get_samples(self, query: Optional[dict] = None) -> pymongo.collection.Cursor:
+    def get_samples(
+        self, query: Optional[dict] = None, projection: Optional[dict] = None
+    ) -> pymongo.collection.Cursor:
         """
         Retrieve multiple samples based on a query.
 
         Args:
             query (dict, optional): The query to filter samples. Defaults to an empty query.
+            projection (dict, optional): The fields to return. Defaults to the whole document.
 
         Returns:
             pymongo.collection.Cursor: A cursor to iterate over the matching samples.
         """
         if query is None:
             query = {}
-        return self.samples_collection().find(query)
+        return self.samples_collection().find(query, projection)
+
+    def count_samples(self, query: Optional[dict] = None) -> int:
+        """
+        Count the samples matching a query on the server.
+
+        Args:
+            query (dict, optional): The query to filter samples. Defaults to an empty query.
+
+        Returns:
+            int: The number of matching samples.
+        """
+        if query is None:
+            query = {}
+        return self.samples_collection().count_documents(query)
 
     def get_samples_by_sample_id(self, sample_id: str) -> pymongo.collection.Cursor:
         """
@@ -117,6 +349,25 @@ class SampleHandler:
         """
         return self.samples_collection().find({"name": sample_id})
 
+    def get_samples_by_ids(
+        self, ids: list[str], projection: Optional[dict] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve several samples by their IDs in a single query.
+
+        Args:
+            ids (list[str]): The IDs of the samples.
+            projection (dict, optional): The fields to return. Defaults to the whole document.
+
+        Returns:
+            dict: The found sample documents keyed by their string ID.
+        """
+        query = {"_id": {"$in": [_object_id(str(_id)) for _id in ids]}}
+        return {
+            str(sample["_id"]): sample
+            for sample in self.samples_collection().find(query, projection)
+        }
+
     def get_sample_name(self, _id: str) -> Any | None:
         """
         Get the name of a sample by its ID.
@@ -127,7 +378,7 @@ class SampleHandler:
         Returns:
             str: The name of the sample.
         """
-        return self.get_sample(_id).get("name")
+        return self._get_field(_id, "name")
 
     def get_vquest_status(self, _id: str) -> Any | None:
         """
@@ -139,7 +390,7 @@ class SampleHandler:
         Returns:
             Any: The vquest status of the sample.
         """
-        return self.get_sample(_id).get("vquest")
+        return self._get_status_field(_id, "vquest")
 
     def get_report_status(self, _id: str) -> Any | None:
         """
@@ -151,7 +402,7 @@ class SampleHandler:
         Returns:
             Any: The report status of the sample.
         """
-        return self.get_sample(_id).get("report")
+        return self._get_status_field(_id, "report")
 
     def get_q30_per(self, _id: str) -> Any | None:
         """
@@ -163,7 +414,7 @@ class SampleHandler:
         Returns:
             Any: The Q30 percentage of the sample.
         """
-        return self.get_sample(_id).get("q30_per")
+        return self._get_status_field(_id, "q30_per")
 
     def get_lymphotrack_excel_status(self, _id: str) -> Any | None:
         """
@@ -175,7 +426,7 @@ class SampleHandler:
         Returns:
             Any: The lymphotrack Excel status of the sample.
         """
-        return self.get_sample(_id).get("lymphotrack_excel")
+        return self._get_field(_id, "lymphotrack_excel")
 
     def get_lymphotrack_excel(self, _id: str) -> Any | None:
         """
@@ -187,7 +438,7 @@ class SampleHandler:
         Returns:
             Any: The lymphotrack Excel path of the sample.
         """
-        return self.get_sample(_id).get("lymphotrack_excel_path")
+        return self._get_field(_id, "lymphotrack_excel_path")
 
     def get_lymphotrack_qc(self, _id: str) -> Any | None:
         """
@@ -199,7 +450,7 @@ class SampleHandler:
         Returns:
             Any: The lymphotrack QC path of the sample.
         """
-        return self.get_sample(_id).get("lymphotrack_qc_path")
+        return self._get_field(_id, "lymphotrack_qc_path")
 
     def get_lymphotrack_qc_status(self, _id: str) -> Any | None:
         """
@@ -211,7 +462,7 @@ class SampleHandler:
         Returns:
             Any: The lymphotrack QC status of the sample.
         """
-        return self.get_sample(_id).get("lymphotrack_qc")
+        return self._get_field(_id, "lymphotrack_qc")
 
     def get_cll_reports(self, _id: str) -> Any:
         """
@@ -223,7 +474,7 @@ class SampleHandler:
         Returns:
             dict: The CLL reports of the sample.
         """
-        return self.get_sample(_id).get("cll_reports", {})
+        return self._get_field(_id, "cll_reports", {})
 
     def get_negative_report(self, _id: str) -> dict | None:
         """
@@ -235,7 +486,7 @@ class SampleHandler:
         Returns:
             dict or None: The negative report of the sample, or None if not found.
         """
-        return self.get_sample(_id).get("negative_report", None)
+        return self._get_field(_id, "negative_report", None)
 
     def negative_report_status(self, _id: str) -> bool:
         """
@@ -260,24 +511,41 @@ class SampleHandler:
             key (str): The key to update.
             value (Any): The new value to set.
 
+        Returns:
+            bool: True if the update was successful, False otherwise.
+        """
+        return self.update_fields(_id, {key: value})
+
+    def update_fields(self, _id: str, fields: Dict[str, Any]) -> bool:
+        """
+        Set several keys of a document in the sample collection with a single write.
+
+        Args:
+            _id (str): The ID of the document to update.
+            fields (dict): The keys to update, mapped to their new values.
+
         Returns:
             bool: True if the update was successful, False otherwise.
         """
         target = SampleHandler._query_id(_id)
-        update_instructions = {"$set": {key: value}}
+        update_instructions = {"$set": fields}
         try:
-            self.samples_collection().find_one_and_update(target, update_instructions)
-            cll_app.logger.debug(f"Update successful for {pformat(update_instructions)}")
+            self.samples_collection().update_one(target, update_instructions)
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(f"Update successful for {pformat(update_instructions)}")
             cll_app.logger.info(
-                f"Update successful for the id {_id} and {pformat(update_instructions)} is successful"
+                f"Update of {', '.join(fields)} for the id {_id} is successful"
             )
             return True
         except PyMongoError as e:
             cll_app.logger.error(f"Update FAILED due to error {str(e)}")
-            cll_app.logger.debug(
-                f"Update FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
-            )
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(
+                    f"Update FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
+                )
             return False
+        finally:
+            self.forget(_id)
 
     def get_submission_reports(self, _id: str, submission_id: str) -> list:
         """
@@ -291,17 +559,104 @@ class SampleHandler:
             list: A list of submission reports, or an empty list if not found.
         """
         try:
-            report_docs = self.get_cll_reports(_id)
-            submission_reports = [
+            submission_num = str(submission_id).rsplit("_", 1)[-1]
+            if not submission_num.isdigit():
+                return []
+            # Report ids are "{sample_name}_{submission_num}_{report_num}"
+            needle = f"_{int(submission_num)}"
+            report_docs = self.get_cll_reports(_id) or {}
+            return sorted(
                 report
-                for report in report_docs.keys()
-                if int(report.split("_")[1]) == int(submission_id.split("_")[-1])
-            ]
-            submission_reports.sort()
-            return submission_reports
-        except KeyError or ValueError or TypeError:
+                for report in report_docs
+                if report.rpartition("_")[0].endswith(needle)
+            )
+        except (KeyError, ValueError, TypeError, AttributeError):
             return []
 
+    def get_report_counter(self, _id: str, submission_num: str) -> int | None:
+        """
+        Get the highest report number issued for a submission of a sample.
+
+        Args:
+            _id (str): The ID of the sample.
+            submission_num (str): The submission number, e.g. "1" for "submission_1".
+
+        Returns:
+            int or None: The highest report number, or None if no counter is stored yet.
+        """
+        sample = self.samples_collection().find_one(
+            SampleHandler._query_id(_id), {f"report_counters.{submission_num}": 1}
+        )
+        if sample is None:
+            return None
+        return sample.get("report_counters", {}).get(str(submission_num))
+
+    def set_report_counter(self, _id: str, submission_num: str, report_num: int) -> bool:
+        """
+        Raise the report counter of a submission to the given report number.
+
+        The counter only ever moves forward, so exporting an older report number does not reset it.
+
+        Args:
+            _id (str): The ID of the sample.
+            submission_num (str): The submission number, e.g. "1" for "submission_1".
+            report_num (int): The report number that has been issued.
+
+        Returns:
+            bool: True if the update was successful, False otherwise.
+        """
+        update_instructions = {"$max": {f"report_counters.{submission_num}": int(report_num)}}
+        try:
+            self.samples_collection().update_one(
+                SampleHandler._query_id(_id), update_instructions
+            )
+            return True
+        except PyMongoError as e:
+            cll_app.logger.error(f"Report counter update FAILED due to error {str(e)}")
+            return False
+        finally:
+            self.forget(_id)
+
+    def refresh_report_status(self, _id: str) -> Optional[Dict[str, Any]]:
+        """
+        Recompute the report status of a sample in the database.
+
+        The status is True if the sample has at least one visible (not hidden) CLL report
+        or a negative report. It is evaluated and written in a single pipeline update.
+
+        Args:
+            _id (str): The ID of the sample.
+
+        Returns:
+            dict or None: The sample name and updated report status, or None if the update failed.
+        """
+        visible_reports = {
+            "$size": {
+                "$filter": {
+                    "input": {"$objectToArray": {"$ifNull": ["$cll_reports", {}]}},
+                    "cond": {"$not": ["$$this.v.hidden"]},
+                }
+            }
+        }
+        negative_reports = {
+            "$size": {"$objectToArray": {"$ifNull": ["$negative_report", {}]}}
+        }
+        update_pipeline = [
+            {"$set": {"report": {"$gt": [{"$add": [visible_reports, negative_reports]}, 0]}}}
+        ]
+        try:
+            return self.samples_collection().find_one_and_update(
+                SampleHandler._query_id(_id),
+                update_pipeline,
+                projection={"name": 1, "report": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            cll_app.logger.error(f"Report status update FAILED due to error {str(e)}")
+            return None
+        finally:
+            self.forget(_id)
+
     def update_report(self, _id: str, report_id: str, query_type: str, user_name: str) -> bool:
         """
         Update the status of a report in the sample database.
@@ -318,32 +673,31 @@ class SampleHandler:
             bool: True if the update was successful, False otherwise.
         """
         target = self._query_id(_id)
-        cll_reports = self.get_sample(_id).get("cll_reports")
-
-        if cll_reports and report_id in cll_reports:
-            cll_reports_new = deepcopy(cll_reports)
-
-            if query_type == "hide":
-                cll_reports_new[report_id]["hidden"] = True
-                cll_reports_new[report_id]["hidden_by"] = user_name
-                cll_reports_new[report_id]["time_hidden"] = datetime.now()
-            elif query_type == "show":
-                cll_reports_new[report_id]["hidden"] = False
-
-            update_instructions = {"$set": {"cll_reports": cll_reports_new}}
-
-            try:
-                self.samples_collection().find_one_and_update(target, update_instructions)
-                cll_app.logger.debug(f"report update: {pformat(update_instructions)}")
-                cll_app.logger.info(f"Report update for the id {report_id} is successful")
-                return True
-            except PyMongoError as e:
-                cll_app.logger.error(f"Report update FAILED due to error {str(e)}")
+        target[f"cll_reports.{report_id}"] = {"$exists": True}
+
+        set_fields = {f"cll_reports.{report_id}.hidden": query_type == "hide"}
+        if query_type == "hide":
+            set_fields[f"cll_reports.{report_id}.hidden_by"] = user_name
+            set_fields[f"cll_reports.{report_id}.time_hidden"] = datetime.now(timezone.utc)
+        update_instructions = {"$set": set_fields}
+
+        try:
+            result = self.samples_collection().update_one(target, update_instructions)
+        except PyMongoError as e:
+            cll_app.logger.error(f"Report update FAILED due to error {str(e)}")
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
                 cll_app.logger.debug(
                     f"Report update FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
                 )
-                return False
-        else:
+            return False
+        finally:
+            self.forget(_id)
+
+        if result.matched_count != 1:
             cll_app.logger.error(f"Report id: {report_id} does not exist")
-            cll_app.logger.debug(f"Report id: {report_id} does not exist")
             return False
+
+        if cll_app.logger.isEnabledFor(logging.DEBUG):
+            cll_app.logger.debug(f"report update: {pformat(update_instructions)}")
+        cll_app.logger.info(f"Report update for the id {report_id} is successful")
+        return True
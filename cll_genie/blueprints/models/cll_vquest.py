@@ -1,11 +1,19 @@
 from flask import current_app as cll_app
+from flask import g, has_request_context
 import pymongo
 from pymongo.errors import PyMongoError
 from bson.objectid import ObjectId
 from pprint import pformat
 import os
-import shutil
+import logging
 from typing import Any
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def _object_id(_id: str) -> ObjectId:
+    """Cached ObjectId parsing for the results queries."""
+    return ObjectId(_id)
 
 
 class ResultsHandler:
@@ -29,6 +37,7 @@ class ResultsHandler:
         self.mongo_client = None
         self.db = None
         self.collection = None
+        self._collection = None
 
     def initialize(self, mongo_client: pymongo.MongoClient, db_name: str, collection_name: str) -> None:
         """
@@ -42,15 +51,16 @@ class ResultsHandler:
         self.mongo_client = mongo_client
         self.db = db_name
         self.collection = collection_name
+        self._collection = mongo_client[db_name][collection_name]
 
-    def results_collection(self) -> pymongo.MongoClient:
+    def results_collection(self) -> pymongo.collection.Collection:
         """
         Get the MongoDB collection for results.
 
         Returns:
-            pymongo.MongoClient: The MongoDB collection instance.
+            pymongo.collection.Collection: The collection handle cached by initialize.
         """
-        return self.mongo_client[self.db][self.collection]
+        return self._collection
 
     @staticmethod
     def _query_id(_id: str) -> dict:
@@ -63,20 +73,149 @@ class ResultsHandler:
         Returns:
             dict: A dictionary with the ObjectId query.
         """
-        return {"_id": ObjectId(_id)}
+        return {"_id": _object_id(_id)}
+
+    @staticmethod
+    def _request_cache() -> dict | None:
+        """
+        Get the per-request cache of fetched results documents.
+
+        Returns:
+            dict or None: Cached documents keyed by ID and projection, or None outside a request.
+        """
+        if not has_request_context():
+            return None
+        if "results_cache" not in g:
+            g.results_cache = {}
+        return g.results_cache
+
+    @staticmethod
+    def _forget(_id: str) -> None:
+        """
+        Drop a results document from the per-request cache after it has been written.
 
-    def get_results(self, _id: str) -> dict | None:
+        Args:
+            _id (str): The ID of the results document.
+        """
+        cache = ResultsHandler._request_cache()
+        if cache is not None:
+            cache.pop(str(_id), None)
+
+    def get_results(self, _id: str, projection: dict | None = None) -> dict | None:
         """
         Retrieve a results document by its ID.
 
+        Documents are memoized for the rest of the request, so repeated lookups while
+        rendering a report only hit the database once.
+
         Args:
             _id (str): The ID of the results document.
+            projection (dict, optional): The fields to return. Defaults to the whole document.
 
         Returns:
             dict or None: The results document if found, otherwise None.
         """
+        if not ObjectId.is_valid(_id):
+            return None
+        cache = ResultsHandler._request_cache()
+        projection_key = tuple(sorted(projection.items())) if projection else None
+
+        if cache is not None:
+            cached = cache.get(str(_id), {})
+            # The whole document answers any projection
+            for key in (None, projection_key):
+                if key in cached:
+                    return cached[key]
+
         query = ResultsHandler._query_id(_id)
-        return self.results_collection().find_one(query)
+        results = self.results_collection().find_one(query, projection)
+
+        if cache is not None and results is not None:
+            cache.setdefault(str(_id), {})[projection_key] = results
+
+        return results
+
+    def get_results_projected(self, _id: str, submission_id: str, fields: tuple) -> dict | None:
+        """
+        Retrieve selected fields of a single submission from a results document.
+
+        Only the requested sub-tree of the submission is sent over the wire.
+
+        Args:
+            _id (str): The ID of the results document.
+            submission_id (str): The submission ID.
+            fields (tuple): The submission fields to return, e.g. ("vquest_parameters",).
+
+        Returns:
+            dict or None: The submission with the requested fields, or None if not found.
+        """
+        projection = {f"results.{submission_id}.{field}": 1 for field in fields}
+        try:
+            return self.get_results(_id, projection=projection)["results"][submission_id]
+        except (KeyError, TypeError):
+            return None
+
+    def get_submission_summaries(
+        self,
+        _id: str,
+        submission_id: str,
+        summary_columns: list,
+        junction_columns: list,
+    ) -> dict | None:
+        """
+        Retrieve the selected summary and junction columns for every sequence of a submission.
+
+        The columns are picked out server-side, so the unused V-QUEST columns are never sent
+        over the wire. Columns missing from a sequence are left out of its row.
+
+        Args:
+            _id (str): The ID of the results document.
+            submission_id (str): The submission ID.
+            summary_columns (list): The summary columns to return.
+            junction_columns (list): The junction columns to return.
+
+        Returns:
+            dict or None: Rows of columns keyed by sequence ID, or None if the submission has no results.
+        """
+        row = {
+            "$mergeObjects": [
+                {col: f"$$seq.v.summary.{col}" for col in summary_columns},
+                {col: f"$$seq.v.junction.{col}" for col in junction_columns},
+            ]
+        }
+        pipeline = [
+            {"$match": ResultsHandler._query_id(_id)},
+            {
+                "$project": {
+                    "_id": 0,
+                    "seqs": {
+                        "$objectToArray": f"$results.{submission_id}.vquest_results"
+                    },
+                }
+            },
+            {
+                "$project": {
+                    "seqs": {
+                        "$arrayToObject": {
+                            "$map": {
+                                "input": "$seqs",
+                                "as": "seq",
+                                "in": {"k": "$$seq.k", "v": row},
+                            }
+                        }
+                    }
+                }
+            },
+        ]
+        try:
+            doc = next(self.results_collection().aggregate(pipeline), None)
+        except PyMongoError as e:
+            cll_app.logger.error(f"Fetching submission summaries FAILED due to error {str(e)}")
+            return None
+
+        if doc is None:
+            return None
+        return doc.get("seqs")
 
     def results_document_exists(self, _id: str) -> bool:
         """
@@ -88,7 +227,17 @@ class ResultsHandler:
         Returns:
             bool: True if the document exists, False otherwise.
         """
-        return bool(self.get_results(_id))
+        cache = ResultsHandler._request_cache()
+        if cache is not None and cache.get(str(_id)):
+            return True
+        if not ObjectId.is_valid(_id):
+            return False
+        return (
+            self.results_collection().count_documents(
+                ResultsHandler._query_id(_id), limit=1
+            )
+            == 1
+        )
 
     def get_submission_results(self, _id: str, submission_id: str) -> dict | None:
         """
@@ -117,7 +266,9 @@ class ResultsHandler:
         Returns:
             bool: True if the submission results exist, False otherwise.
         """
-        return bool(self.get_submission_results(_id, submission_id))
+        target = ResultsHandler._query_id(_id)
+        target[f"results.{submission_id}"] = {"$exists": True}
+        return self.results_collection().count_documents(target, limit=1) == 1
 
     def get_submission_count(self, _id: str) -> int:
         """
@@ -145,6 +296,7 @@ class ResultsHandler:
             bool: True if the deletion was successful, False otherwise.
         """
         target = ResultsHandler._query_id(_id)
+        ResultsHandler._forget(_id)
         try:
             self.results_collection().delete_one(target)
             return True
@@ -162,17 +314,31 @@ class ResultsHandler:
         Returns:
             bool: True if the deletion was successful, False otherwise.
         """
-        if self.submission_result_exists(_id, submission_id):
-            results = self.get_results(_id)["results"]
-            local_results_path = os.path.dirname(
-                results[submission_id]["results_zip_file"]
-            )[: -len("/vquest")]
-            self.delete_submission_results_locally(local_results_path)
-            results.pop(submission_id)
-            return self.update_document(_id, "results", results)
-        else:
+        target = ResultsHandler._query_id(_id)
+        target[f"results.{submission_id}"] = {"$exists": True}
+        ResultsHandler._forget(_id)
+
+        try:
+            # Returns the document as it was before the unset, for the zip file path
+            removed = self.results_collection().find_one_and_update(
+                target,
+                {"$unset": {f"results.{submission_id}": ""}},
+                projection={f"results.{submission_id}.results_zip_file": 1},
+            )
+        except PyMongoError as e:
+            cll_app.logger.error(f"Delete submission results FAILED due to error {str(e)}")
+            return False
+
+        if removed is None:
             return False
 
+        zip_file = removed["results"][submission_id].get("results_zip_file")
+        if zip_file:
+            self.delete_submission_results_locally(
+                os.path.dirname(zip_file)[: -len("/vquest")]
+            )
+        return True
+
     def delete_submission_results_locally(self, local_path: str) -> bool:
         """
         Delete local files for submission results.
@@ -189,6 +355,8 @@ class ResultsHandler:
                 if os.path.isfile(local_path):
                     os.remove(local_path)
                 elif os.path.isdir(local_path):
+                    import shutil  # Only needed when results are deleted
+
                     shutil.rmtree(local_path)
                 return True
             except OSError as e:
@@ -214,17 +382,20 @@ class ResultsHandler:
         """
         target = ResultsHandler._query_id(_id)
         update_instructions = {"$set": {key: value}}
+        ResultsHandler._forget(_id)
 
         try:
-            self.results_collection().find_one_and_update(target, update_instructions)
-            cll_app.logger.debug(f"Update results: {pformat(update_instructions)}")
+            self.results_collection().update_one(target, update_instructions)
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(f"Update results: {pformat(update_instructions)}")
             cll_app.logger.info(f"Update results for the id {_id} is successful")
             return True
         except PyMongoError as e:
             cll_app.logger.error(f"Update results FAILED due to error {str(e)}")
-            cll_app.logger.debug(
-                f"Update results FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
-            )
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(
+                    f"Update results FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
+                )
             return False
 
     def update_comments(self, _id: str, submission_id: str, key: str, value: Any) -> bool:
@@ -241,20 +412,23 @@ class ResultsHandler:
             bool: True if the update was successful, False otherwise.
         """
         target = ResultsHandler._query_id(_id)
-
-        results = self.get_results(_id)["results"]
-        results[submission_id][key] = value
-
-        update_instructions = {"$set": {"results": results}}
+        target[f"results.{submission_id}"] = {"$exists": True}
+        update_instructions = {"$set": {f"results.{submission_id}.{key}": value}}
+        ResultsHandler._forget(_id)
 
         try:
-            self.results_collection().find_one_and_update(target, update_instructions)
-            cll_app.logger.debug(f"Update results: {pformat(update_instructions)}")
+            result = self.results_collection().update_one(target, update_instructions)
+            if result.matched_count != 1:
+                cll_app.logger.error(f"Submission id: {submission_id} does not exist")
+                return False
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(f"Update results: {pformat(update_instructions)}")
             cll_app.logger.info(f"Update results for the id {_id} is successful")
             return True
         except PyMongoError as e:
             cll_app.logger.error(f"Update results FAILED due to error {str(e)}")
-            cll_app.logger.debug(
-                f"Update results FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
-            )
+            if cll_app.logger.isEnabledFor(logging.DEBUG):
+                cll_app.logger.debug(
+                    f"Update results FAILED due to error {str(e)} and for the update instructions {pformat(update_instructions)}"
+                )
             return False
@@ -3,12 +3,14 @@ This module initializes and provides shared extensions and handlers for the appl
 
 It exposes instances such as:
 - `login_manager`: Manages user session authentication.
+- `cache`: Caches authorization decisions and other short-lived lookups.
 - `mongo`: Handles MongoDB connections via PyMongo.
 - `sample_handler`: Provides sample data operations.
 - `results_handler`: Manages V-QUEST results processing.
 
 These objects are intended for use throughout the app to ensure consistent access and configuration.
 """
+from flask_caching import Cache  # type: ignore
 from flask_login import LoginManager, current_user  # type: ignore
 from flask_pymongo import PyMongo  # type: ignore
 
@@ -17,6 +19,7 @@ from cll_genie.blueprints.models.cll_vquest import ResultsHandler
 
 
 login_manager = LoginManager()
+cache = Cache()
 mongo = PyMongo()
 sample_handler = SampleHandler()
 results_handler = ResultsHandler()
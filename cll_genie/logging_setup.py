@@ -8,8 +8,11 @@ class ColorfulFormatter(logging.Formatter):
 
     This class leverages the `colorlog` library to improve the readability of log output in both the console and log files. Each log level is displayed in a distinct color, making it easier to identify and differentiate messages by their importance.
 
+    The underlying `colorlog.ColoredFormatter` is built once and reused for every record.
+
     Attributes:
-        None
+        LOG_FORMAT (str): The colorlog format string.
+        LOG_COLORS (dict): The color of each log level.
 
     Methods:
         format(record):
@@ -17,24 +20,30 @@ class ColorfulFormatter(logging.Formatter):
             Uses the `colorlog` library to assign specific colors to each log level.
     """
 
-def format(self, record: logging.LogRecord) -> str:
+    # LOG_FORMAT = "%(log_color)s%(levelname)-5s %(log_color)s%(message)s"
+    LOG_FORMAT = "%(asctime)s - %(log_color)s%(levelname)s - %(message)s"
+    LOG_COLORS = {
+        "DEBUG": "cyan",
+        "INFO": "green",
+        "WARNING": "yellow",
+        "ERROR": "red",
+        "CRITICAL": "red,bg_white",
+    }
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._colored_formatter = colorlog.ColoredFormatter(
+            ColorfulFormatter.LOG_FORMAT, log_colors=ColorfulFormatter.LOG_COLORS
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
         """
         Formats a log record by applying color to the log message based on its severity level.
 
         This method uses the `colorlog` library to assign specific colors to each log level,
         enhancing the readability of log output in both the console and log files.
         """
-        # log_fmt = "%(log_color)s%(levelname)-5s %(log_color)s%(message)s"
-        log_fmt = '%(asctime)s - %(log_color)s%(levelname)s - %(message)s"'
-        colors = {
-            "DEBUG": "cyan",
-            "INFO": "green",
-            "WARNING": "yellow",
-            "ERROR": "red",
-            "CRITICAL": "red,bg_white",
-        }
-        formatter = colorlog.ColoredFormatter(log_fmt, log_colors=colors)
-        return formatter.format(record)
+        return self._colored_formatter.format(record)
 
 
 def configure_logging(log_level: int, log_file: str) -> logging.Logger:
@@ -42,8 +51,8 @@ def configure_logging(log_level: int, log_file: str) -> logging.Logger:
     Configures the logging system with both file and console handlers.
 
     This function sets up logging to output messages to a specified log file and the console.
-    It uses a colorful formatter to enhance the readability of log messages by applying colors
-    based on the severity level.
+    When the console is a terminal, a colorful formatter enhances the readability of log
+    messages by applying colors based on the severity level.
 
     Args:
         log_level (int): The logging level (e.g., logging.DEBUG, logging.INFO).
@@ -54,15 +63,16 @@ def configure_logging(log_level: int, log_file: str) -> logging.Logger:
     """
     log_format = "%(asctime)s - %(levelname)s - %(message)s"
 
-    # Create a file handler with colorful formatter
+    # Create a file handler with a plain formatter, color codes are noise in a file
     file_handler = logging.FileHandler(log_file)
-    file_formatter = ColorfulFormatter(log_format)
-    file_handler.setFormatter(file_formatter)
+    file_handler.setFormatter(logging.Formatter(log_format))
 
-    # Create a stream handler with colorful formatter
+    # Create a stream handler, colorful only when writing to a terminal
     stream_handler = logging.StreamHandler()
-    stream_formatter = ColorfulFormatter(log_format)
-    stream_handler.setFormatter(stream_formatter)
+    if stream_handler.stream.isatty():
+        stream_handler.setFormatter(ColorfulFormatter(log_format))
+    else:
+        stream_handler.setFormatter(logging.Formatter(log_format))
 
     # Add both handlers to the logger
     logger = logging.getLogger()
@@ -34,14 +34,28 @@ class Config:
     TESTING = False
     SESSION_COOKIE_NAME = "cll_genie"
     VQUEST_URL = "https://www.imgt.org/IMGT_vquest/analysis"
+    # (connect, read) timeouts in seconds for V-QUEST requests
+    VQUEST_TIMEOUT = (
+        float(os.getenv("VQUEST_CONNECT_TIMEOUT", "10")),
+        float(os.getenv("VQUEST_READ_TIMEOUT", "600")),
+    )
     APP_VERSION = os.environ.get("CLL_GENIE_VERSION") or None
 
     # Main page settings
     PAGE_SIZE = 25
 
+    # Flask-Caching settings
+    CACHE_TYPE = "SimpleCache"
+    CACHE_DEFAULT_TIMEOUT = 600
+    # Seconds a sample's vquest/report/q30 status may be served from the cache
+    SAMPLE_STATUS_CACHE_TIMEOUT = 5
+
     # Set from ENV:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "notsosecret"
 
+    # Werkzeug hash method for new passwords, e.g. "pbkdf2:sha256:<iterations>"
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256")
+
     # Mongo database details
     DB_NAME = os.getenv("DB_NAME", "cll_genie")
     DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -49,10 +63,17 @@ class Config:
     DB_SAMPLES_COLLECTION = os.getenv("DB_SAMPLES_COLLECTION", "samples")
     DB_RESULTS_COLLECTION = os.getenv("DB_RESULTS_COLLECTION", "vquest_results")
     MONGO_URI = f"mongodb://{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    # Options for the single MongoClient shared by all handlers
+    MONGO_CLIENT_OPTIONS = {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", str(4 * (os.cpu_count() or 1)))),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "4")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "3000")),
+        "retryWrites": True,
+    }
 
     # User groups with permission to delete cll_genie samples and vquest_results
     # All users granted permission to edit if DEBUG = True
-    CLL_GENIE_SUPER_PERMISSION_GROUPS = ["admin", "lymphotrack_admin"]
+    CLL_GENIE_SUPER_PERMISSION_GROUPS = frozenset(["admin", "lymphotrack_admin"])
 
     # Results and analysis settings
     ANALYSIS_OUTDIR = os.path.join(
@@ -7,17 +7,47 @@ __version__ = "1.0.0"
 # Importing Libraries
 import os
 import re
+import csv
 import json
 import datetime
 import argparse
 import colorlog
 from pathlib import Path
-from copy import deepcopy
-from pymongo import MongoClient
-from typing import List, Dict, Any, LiteralString, Union
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import List, Dict, Any, Union
 from dotenv import dotenv_values, load_dotenv
 from pprint import pprint
 import logging
+import time
+from types import MappingProxyType
+
+try:  # orjson parses large Stats.json files considerably faster when installed
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Fields of a newly registered sample; the None values are filled per sample
+SAMPLE_OBJ_TEMPLATE: Dict[str, Any] = {
+    "name": None,
+    "clarity_id": None,
+    "total_raw_bases": None,
+    "total_raw_reads": None,
+    "lymphotrack_excel": False,
+    "lymphotrack_excel_path": "",
+    "lymphotrack_qc": False,
+    "lymphotrack_qc_path": "",
+    "vquest": False,
+    "report": False,
+    "total_bases": "",
+    "q30_bases": "",
+    "q30_per": "",
+    "date_added": None,
+}
 
 
 class Config:
@@ -28,7 +58,7 @@ class Config:
         _LYMPHOTRACK_ROOT_DIR (str): Root directory for lymphotrack data.
         _CONFIG (dict): Base configuration settings including keywords, directories, filenames, and database name.
         test_config (dict): Environment-specific configurations for testing mode.
-        env_config (dict): Configuration values loaded from a .env file.
+        env_config (MappingProxyType): Read-only snapshot of the values loaded from the .env file.
         testing (bool): Indicates whether the script is running in testing mode.
 
     Methods:
@@ -41,12 +71,10 @@ class Config:
     """
 
     _LYMPHOTRACK_ROOT_DIR = "/data/lymphotrack"
-    _DATETIME = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")  # Define datetime separately
     _LOG_DIR = f"{_LYMPHOTRACK_ROOT_DIR}/logs/register_logs"  # Define log directory separately
     _CONFIG: dict[str, Any] = {
         "SAMPLESHEET_KEYWORDS": ["lymphotrack", "IGH", "SHM", "LEADER"],
         "EXCLUDE_SAMPLE_TAGS": ["POS", "NEG", "IGHSHM"],
-        "DATETIME": _DATETIME,
         "ROOT_DIR": str(Path(__file__).resolve().parent.parent),
         "LOG_DIR": f"{_LYMPHOTRACK_ROOT_DIR}/logs/register_logs",
         "LOG_FILE": f"{_LOG_DIR}/cll_genie-register-samples.production.log",
@@ -58,6 +86,7 @@ class Config:
         "CLL_GENIE_COMPLETED_FILE": "cll_genie.done",
         "SAMPLESHEET_NAME": "SampleSheet.csv",
         "LYMPHOTRACK_ROOT_DIR": f"{_LYMPHOTRACK_ROOT_DIR}/results/lymphotrack_dx/",
+        "SCAN_WORKERS": 16,  # Threads listing LYMPHOTRACK_ROOT_DIR in parallel
         "DB_NAME": "cll_genie",
         "DB_COLLECTION": "samples",
         "MODE": "prod",
@@ -78,16 +107,20 @@ class Config:
     # Load .env file
     load_dotenv(f"{_CONFIG["ROOT_DIR"]}/.env")
 
-    # Extract only DB_HOST and DB_PORT
-    env_config = {
-        "DB_HOST": os.getenv("DB_HOST"),
-        "DB_PORT": os.getenv("DB_PORT"),
-    }
+    # Extract only DB_HOST and DB_PORT, snapshotted read-only when the class is created.
+    # New environment settings belong here rather than in os.getenv calls at call sites.
+    env_config = MappingProxyType(
+        {
+            "DB_HOST": os.getenv("DB_HOST"),
+            "DB_PORT": os.getenv("DB_PORT"),
+        }
+    )
 
     @classmethod
     def get_config(cls):
         """Return the active configuration based on the current mode."""
-        _conf = deepcopy(cls._CONFIG)
+        _conf = dict(cls._CONFIG)  # Values are never mutated, a shallow copy is enough
+        _conf["DATETIME"] = get_time_now()  # When the configuration was loaded
         if cls.testing:
             _conf.update(cls.test_config)
         _conf.update(cls.env_config)
@@ -118,11 +151,13 @@ class MongoDBConnection:
 
     Methods:
         connect():
-            Establishes a connection to the MongoDB server.
+            Establishes a connection to the MongoDB server and ensures the sample name index.
         close():
             Closes the connection to the MongoDB server.
         get_collection():
             Returns a MongoDB collection instance.
+
+    Can be used as a context manager, which connects on entry and closes the client on exit.
     """
 
     def __init__(self, db_name: str, collection_name: str):
@@ -135,17 +170,33 @@ class MongoDBConnection:
     def connect(self):
         """Establish a connection to the MongoDB server."""
         try:
-            self._client = MongoClient()
+            # One client (and its connection pool) serves the whole run
+            self._client = MongoClient(maxPoolSize=10, retryWrites=True)
             self._db = self._client[self.db_name]
             self._collection = self._db[self.collection_name]
             logger.info("Connected to MongoDB successfully.")
         except Exception as e:
             logger.error(f"Error connecting to MongoDB: {e}")
+            return
+
+        try:
+            # Serves the upserts by sample name, same index as the cll_genie app creates
+            self._collection.create_index("name", background=True)
+        except Exception as e:
+            logger.warning(f"Could not ensure the sample name index: {e}")
 
     def close(self):
         """Close the connection to the MongoDB server."""
         if self._client:
             self._client.close()
+            self._client = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def get_collection(self):
         """Return a MongoDB collection instance."""
@@ -171,16 +222,16 @@ class CllGenieSampleRegister:
             Retrieves the path to the run stats file for a given run.
         parse_samplesheet(samplesheet):
             Parses the samplesheet and returns a list of samples and instrument type.
-        parse_sample_elements(raw_sample, header):
-            Parses individual sample elements from the samplesheet.
+        parse_sample_elements(sample_row):
+            Parses individual sample elements from a samplesheet row.
         parse_run_stats(run_stats):
             Parses the run stats file and returns a dictionary with required fields.
         register_samples_in_db(samples, demux_stats, run_metadata):
             Registers samples in the database with metadata and stats.
         create_sample_obj(sample_id, clarity_id, run_metadata, raw_reads, raw_bases):
             Creates a sample object with required fields for database insertion.
-        insert_sample(sample_obj, overwrite):
-            Inserts a sample object into the database, with optional overwrite.
+        insert_samples(sample_objs, overwrite):
+            Inserts sample objects into the database in one bulk write, with optional overwrite.
         finish_run_registration(run):
             Marks a run as registered by creating a completion file.
     """
@@ -191,6 +242,9 @@ class CllGenieSampleRegister:
         self.run_folder_pattern: re.Pattern[str] = re.compile(
             r"^\d{6}_[A-Z]\d{5}_\d{4}_\d{9}-[A-Z0-9]{5}$"
         )
+        self.sample_id_pattern: re.Pattern[str] = re.compile(
+            r"\d{2}[A-Z]{2}\d{5}-SHM"  # 00MD00000-SHM
+        )
 
     def register_samples(self):
         runs = self.get_runs_to_register()
@@ -200,18 +254,27 @@ class CllGenieSampleRegister:
         else:
             logger.info(f"Woah.. Found {len(runs)} run(s) for lymphotrack samples hunting.")
 
-        for run in runs:
-            samplesheet = self.get_samplesheet(run)
-            run_stats = self.get_run_stats_file(run)
-            samples, instrument_type = self.parse_samplesheet(samplesheet)
-            print(samples)
-            demux_stats = self.parse_run_stats(run_stats)
+        # Reading the samplesheets and run stats is file I/O, all of it is issued at once:
+        # both files of a run, for every run. The database writes stay in run order, so a
+        # sample seen in two runs is not upserted twice at the same time.
+        with ThreadPoolExecutor(max_workers=min(16, 2 * len(runs))) as pool:
+            samplesheet_reads = [
+                pool.submit(self.parse_samplesheet, self.get_samplesheet(run)) for run in runs
+            ]
+            run_stats_reads = [
+                pool.submit(self.parse_run_stats, self.get_run_stats_file(run)) for run in runs
+            ]
+
+        for run, samplesheet_read, run_stats_read in zip(runs, samplesheet_reads, run_stats_reads):
+            samples, instrument_type = samplesheet_read.result()
+            demux_stats = run_stats_read.result()
             _stats = demux_stats.get("stats", {})
 
             # Logging
             logger.info(msg=f"Looking deeper into the run: {run}")
-            logger.info(f"Found SampleSheet: {samplesheet}")
-            logger.info(f"Found Run Stats File: {run_stats}")
+            logger.info(f"Found SampleSheet: {self.get_samplesheet(run)}")
+            logger.info(f"Found Run Stats File: {self.get_run_stats_file(run)}")
+            logger.debug(f"Samples in the samplesheet: {samples}")
 
             # run metadata
             run_metadata = {
@@ -243,24 +306,35 @@ class CllGenieSampleRegister:
         runs = []
 
         try:
-            root_dir, dirs, _ = next(os.walk(self.config["RUN_ROOT_DIR"]))  # Restrict to one level
-            for dir_name in dirs:
-                if not self.run_folder_pattern.match(dir_name):
-                    continue
-                dir_path: LiteralString | bytes | str | Any = os.path.join(root_dir, dir_name)
-                rta_file = os.path.join(dir_path, self.config["RTA_FILE"])
-                bjorn_file = os.path.join(dir_path, self.config["BJORN_COMPLETED_FILE"])
-                cg_file = os.path.join(dir_path, self.config["CLL_GENIE_COMPLETED_FILE"])
-
-                # Directly check if required files exist inside the folder
-                if os.path.isfile(cg_file):
-                    continue
-                elif os.path.isfile(rta_file) and os.path.isfile(bjorn_file):
-                    runs.append(dir_name)  # Append only folder names
-                else:
-                    logger.warning(f"Run {dir_name} is missing the required completion files.")
-        except StopIteration:
+            with os.scandir(self.config["RUN_ROOT_DIR"]) as run_entries:  # Restrict to one level
+                run_dirs = [
+                    entry
+                    for entry in run_entries
+                    if self.run_folder_pattern.match(entry.name) and entry.is_dir()
+                ]
+        except OSError:
             logger.debug(f"Could not access {self.config['RUN_ROOT_DIR']}")
+            return runs
+
+        completed_file = self.config["CLL_GENIE_COMPLETED_FILE"]
+        required_files = {self.config["RTA_FILE"], self.config["BJORN_COMPLETED_FILE"]}
+
+        for run_dir in run_dirs:
+            # One readdir of the run folder instead of a stat per completion file; names only,
+            # since a type check per entry can cost a stat of its own on some filesystems
+            try:
+                with os.scandir(run_dir.path) as entries:
+                    names = {entry.name for entry in entries}
+            except OSError:
+                logger.warning(f"Could not access run folder {run_dir.path}")
+                continue
+
+            if completed_file in names:
+                continue
+            elif required_files <= names:
+                runs.append(run_dir.name)  # Append only folder names
+            else:
+                logger.warning(f"Run {run_dir.name} is missing the required completion files.")
 
         return runs
 
@@ -283,41 +357,39 @@ class CllGenieSampleRegister:
 
         if not os.path.isfile(samplesheet):
             logger.error(f"Samplesheet file not found: {samplesheet}")
-            return samples  # Return early if file doesn't exist
+            return samples, None  # Return early if file doesn't exist
 
-        found_header = False
         header = None
         instrument_type = None
 
         with open(samplesheet, "r") as samplesheet_fh:
             for line in samplesheet_fh:
-                if not found_header:
-                    if line.startswith("Instrument Type"):
-                        instrument_type = line.split(",")[1]
-                    if all(key in line for key in ["Sample_ID", "Description", "I7_Index_ID"]):
-                        header = line.strip()
-                        found_header = True
-                else:
-                    sample_clarity_pair = self.parse_sample_elements(line, header)
+                if line.startswith("Instrument Type"):
+                    instrument_type = line.split(",")[1]
+                if all(key in line for key in ["Sample_ID", "Description", "I7_Index_ID"]):
+                    header = next(csv.reader([line]))
+                    break
+
+            # The rest of the file is the sample table
+            if header:
+                for row in csv.DictReader(samplesheet_fh, fieldnames=header):
+                    sample_clarity_pair = self.parse_sample_elements(row)
                     if sample_clarity_pair:
                         samples.append(sample_clarity_pair)
         return samples, instrument_type
 
-    def parse_sample_elements(self, raw_sample, header) -> dict:
+    def parse_sample_elements(self, sample_row: dict) -> dict:
         """
-        Parse sample elements from the samplesheet.
+        Parse sample elements from a row of the samplesheet.
         """
 
         sample_dict = {}
 
-        sample_id_pattern = r"\d{2}[A-Z]{2}\d{5}-SHM"  # 00MD00000-SHM
-
         # Sample_ID,Sample_Name,Sample_Plate,Sample_Well,I7_Index_ID,index,I5_Index_ID,index2,Sample_Project,Description
-        sample_elements_dict = dict(zip(header.split(","), raw_sample.split(",")))
-        sample_id = sample_elements_dict.get("Sample_ID")
-        sample_pattern_match = re.match(sample_id_pattern, sample_id)
+        sample_id = sample_row.get("Sample_ID") or ""
+        sample_pattern_match = self.sample_id_pattern.match(sample_id)
         if sample_pattern_match:
-            clarity_id = sample_elements_dict.get("Description", "_").split("_")[1]
+            clarity_id = (sample_row.get("Description") or "_").split("_")[1]
             sample_dict[sample_id] = clarity_id
         return sample_dict
 
@@ -329,32 +401,28 @@ class CllGenieSampleRegister:
             logger.error(f"Run stats file not found: {run_stats}")
             return {}
 
-        with open(run_stats, "r") as json_file:
-            json_data = json.load(json_file)
+        with open(run_stats, "rb") as json_file:
+            json_data = json_loads(json_file.read())
 
         if not json_data:
             return {}
 
+        # Reads and bases per sample, summed over the lanes
+        stats = defaultdict(lambda: {"TRR": 0, "TRB": 0})
+        for sample_lanes in json_data.get("ConversionResults", []):
+            for sample_stats in sample_lanes.get("DemuxResults", []):
+                sample_id = sample_stats.get("SampleId")
+                if sample_id:
+                    sample_totals = stats[sample_id]
+                    sample_totals["TRR"] += sample_stats.get("NumberReads", 0)
+                    sample_totals["TRB"] += sample_stats.get("Yield", 0)
+
         _data = {
             "RunNumber": json_data.get("RunNumber"),
             "Flowcell": json_data.get("Flowcell"),
             "RunId": json_data.get("RunId"),
-            "stats": {},
+            "stats": dict(stats),
         }
-
-        for sample_lanes in json_data.get("ConversionResults", []):
-            for sample_stats in sample_lanes.get("DemuxResults", []):
-                sample_id = sample_stats.get("SampleId")
-                if sample_id:
-                    if sample_id not in _data["stats"]:
-                        _data["stats"][sample_id] = {}
-
-                    _data["stats"][sample_id]["TRR"] = _data["stats"][sample_id].get(
-                        "TRR", 0
-                    ) + sample_stats.get("NumberReads", 0)
-                    _data["stats"][sample_id]["TRB"] = _data["stats"][sample_id].get(
-                        "TRB", 0
-                    ) + sample_stats.get("Yield", 0)
         return _data
 
     def register_samples_in_db(
@@ -363,16 +431,19 @@ class CllGenieSampleRegister:
         """
         Register samples in the database.
         """
+        sample_objs = []
         for sample in samples:
             sample_id, clarity_id = next(iter(sample.items()))
             logger.info(f"Gathering information for sample: {sample_id} ({clarity_id})")
-            # Insert sample into the database
             sample_raw_reads = demux_stats.get(sample_id, {}).get("TRR", 0)
             sample_raw_bases = demux_stats.get(sample_id, {}).get("TRB", 0)
-            sample_obj = self.create_sample_obj(
-                sample_id, clarity_id, deepcopy(run_metadata), sample_raw_reads, sample_raw_bases
+            sample_objs.append(
+                self.create_sample_obj(
+                    sample_id, clarity_id, run_metadata, sample_raw_reads, sample_raw_bases
+                )
             )
-            self.insert_sample(sample_obj, overwrite=self.config["OVER_WRITE"])
+        # Insert all samples of the run into the database at once
+        self.insert_samples(sample_objs, overwrite=self.config["OVER_WRITE"])
 
     def create_sample_obj(
         self, sample_id: str, clarity_id: str, run_metadata: dict, raw_reads: int, raw_bases: int
@@ -381,57 +452,51 @@ class CllGenieSampleRegister:
         Create a sample object with the required fields.
         """
 
-        sample_obj = {
-            "name": sample_id,
-            "clarity_id": clarity_id,
-            "total_raw_bases": raw_bases,
-            "total_raw_reads": raw_reads,
-            "lymphotrack_excel": False,
-            "lymphotrack_excel_path": "",
-            "lymphotrack_qc": False,
-            "lymphotrack_qc_path": "",
-            "vquest": False,
-            "report": False,
-            "total_bases": "",
-            "q30_bases": "",
-            "q30_per": "",
-            "date_added": datetime.datetime.utcnow(),
-        }
-
-        # return sample_obj.update(run_metadata)
-        merged_dict = {**sample_obj, **run_metadata}
-        return merged_dict
+        sample_obj = SAMPLE_OBJ_TEMPLATE.copy()
+        sample_obj["name"] = sample_id
+        sample_obj["clarity_id"] = clarity_id
+        sample_obj["total_raw_bases"] = raw_bases
+        sample_obj["total_raw_reads"] = raw_reads
+        sample_obj["date_added"] = datetime.datetime.utcnow()
+        sample_obj.update(run_metadata)
+        return sample_obj
 
-    def insert_sample(self, sample_obj: dict, overwrite=False):
+    def insert_samples(self, sample_objs: List[Dict[str, Any]], overwrite=False):
         """
-        Insert a sample object into the database.
+        Insert sample objects into the database with a single bulk write.
+
+        New samples are inserted. Existing samples are updated when overwrite is set,
+        and left untouched otherwise.
         """
-        sample_id = sample_obj.get("name")
-        existing_sample = self.db_collection.find_one({"name": sample_id})
+        if not sample_objs:
+            return
+
+        update = "$set" if overwrite else "$setOnInsert"
+        operations = [
+            UpdateOne({"name": sample_obj["name"]}, {update: sample_obj}, upsert=True)
+            for sample_obj in sample_objs
+        ]
+        try:
+            result = self.db_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                logger.error(f"Error registering sample: {sample_objs[error['index']]['name']}, {error.get('errmsg')}")
+            return
+        except Exception as e:
+            logger.error(f"Error registering samples: {[sample_obj['name'] for sample_obj in sample_objs]}, {e}")
+            return
 
-        if existing_sample:
-            if overwrite:
+        for index, sample_obj in enumerate(sample_objs):
+            sample_id = sample_obj["name"]
+            if index in result.upserted_ids:
+                logger.info(f"Sample {sample_id} registered successfully.")
+            elif overwrite:
                 logger.warning(f"Sample {sample_id} already exists in the database.")
-                logger.info(f"Dont worry.. overriding and updating the sample {sample_id}.")
-                result = self.db_collection.update_one(
-                    {"name": sample_id}, {"$set": sample_obj}, upsert=True
-                )
-                if result.matched_count > 0:
-                    logger.info(f"Sample {sample_id} updated successfully.")
-                elif result.upserted_id:
-                    logger.info(f"Sample {sample_id} registered successfully.")
-                else:
-                    logger.error(f"Error registering or updating sample: {sample_id}")
+                logger.info(f"Sample {sample_id} updated successfully.")
             else:
                 logger.warning(
                     f"Sample {sample_id} already exists in the database. Skipping because of overwrite protection."
                 )
-        else:
-            try:
-                self.db_collection.insert_one(sample_obj)
-                logger.info(f"Sample {sample_id} registered successfully.")
-            except Exception as e:
-                logger.error(f"Error registering sample: {sample_id}, {e}")
 
     def finish_run_registration(self, run: str):
         """
@@ -467,18 +532,54 @@ class CllGenieAddLymphotrackResults:
         self.db_collection = db_collection
 
     def update_lymphotrack_results(self):
-        samples = self.get_samples_without_lymphotrack_results()
+        # Only _id and name are projected, so one list of the samples is cheap to hold
+        samples = list(self.get_samples_without_lymphotrack_results())
         if not samples:
             logger.info("No sample needs Lymphotrack results update.")
             return
         else:
-            logger.info(f"{len(list(samples))} samples found without Lymphotrack results.")
-        files_on_disk = self.get_lymphotrack_results_on_disk(deepcopy(samples))
+            logger.info(f"{len(samples)} samples found without Lymphotrack results.")
+        files_on_disk = self.get_lymphotrack_results_on_disk(samples)
 
     def get_samples_without_lymphotrack_results(self):
         query = {"$or": [{"lymphotrack_excel": False}, {"lymphotrack_qc": False}]}
         projection = {"_id": 1, "name": 1}
-        return self.db_collection.find(query, projection)
+        # The documents are tiny, so large batches mean few getMore round-trips
+        return self.db_collection.find(query, projection).batch_size(500)
+
+    def scan_lymphotrack_dir(self, dir_path: str) -> tuple[List[str], List[str], List[str]]:
+        """
+        List one directory of the lymphotrack results for files not yet added.
+
+        A file counts as added when a "{file}.added" marker sits next to it, which is
+        checked against the same listing. Like os.walk, unreadable directories are
+        skipped and symlinked directories are not followed.
+        """
+        excel_files, qc_files, sub_dirs = [], [], []
+        try:
+            with os.scandir(dir_path) as entries:
+                entries = list(entries)
+        except OSError:
+            return excel_files, qc_files, sub_dirs
+
+        file_names = []
+        for entry in entries:
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    sub_dirs.append(entry.path)
+            else:
+                file_names.append(entry.name)
+        files = set(file_names)
+
+        for file in file_names:
+            if f"{file}.added" in files:
+                continue
+            if file.endswith((".xlsm", ".xlsx", ".xls")):
+                excel_files.append(os.path.join(dir_path, file))
+            elif file.endswith(".fastq_indexQ30.tsv"):
+                qc_files.append(os.path.join(dir_path, file))
+
+        return excel_files, qc_files, sub_dirs
 
     def get_lymphotrack_results_on_disk(self, samples: List[Dict[str, Any]]):
 
@@ -487,58 +588,85 @@ class CllGenieAddLymphotrackResults:
             return {}
 
         lymphotrack_files = {"excel": [], "qc": []}
-        for root, _, files in os.walk(self.config["LYMPHOTRACK_ROOT_DIR"]):
-            for file in files:
-                if (file.endswith(".xlsm") or file.endswith(".xlsx") or file.endswith(".xls")) and not os.path.isfile(
-                    os.path.join(root, f"{file}.added")
-                ):
-                    lymphotrack_files["excel"].append(os.path.join(root, file))
-                elif file.endswith(".fastq_indexQ30.tsv") and not os.path.isfile(
-                    os.path.join(root, f"{file}.added")
-                ):
-                    lymphotrack_files["qc"].append(os.path.join(root, file))
 
+        # Walk the tree one level at a time, listing the directories of a level in parallel
+        pending_dirs = [self.config["LYMPHOTRACK_ROOT_DIR"]]
+        with ThreadPoolExecutor(max_workers=self.config["SCAN_WORKERS"]) as pool:
+            while pending_dirs:
+                next_dirs = []
+                for excel_files, qc_files, sub_dirs in pool.map(self.scan_lymphotrack_dir, pending_dirs):
+                    lymphotrack_files["excel"].extend(excel_files)
+                    lymphotrack_files["qc"].extend(qc_files)
+                    next_dirs.extend(sub_dirs)
+                pending_dirs = next_dirs
+
+        # Scan each file path once for any of the sample ids, keeping the first file per sample
+        sample_ids = sorted({sample.get("name") for sample in samples if sample.get("name")}, key=len, reverse=True)
+        files_by_sample = {"excel": {}, "qc": {}}
+        if sample_ids:
+            sample_id_pattern = re.compile("|".join(map(re.escape, sample_ids)))
+            for file_type, files in lymphotrack_files.items():
+                for file in files:
+                    for found_id in sample_id_pattern.findall(file):
+                        files_by_sample[file_type].setdefault(found_id, file)
+
+        operations = []
+        added_files = []  # Files of each operation, marked as added once it is written
         for sample in samples:
             sample_id = sample.get("name")
             logging.info(f"Gathering Lymphotrack results for sample: {sample_id}")
-            excel_file = next((f for f in lymphotrack_files["excel"] if sample_id in f), None)
-            qc_file = next((f for f in lymphotrack_files["qc"] if sample_id in f), None)
+            excel_file = files_by_sample["excel"].get(sample_id)
+            qc_file = files_by_sample["qc"].get(sample_id)
             logging.debug(f"Found Excel file: {excel_file}")
 
+            sample_update = {}
+            sample_files = []
             if excel_file:
-                self.db_collection.update_one(
-                    {"name": sample_id},
-                    {
-                        "$set": {
-                            "lymphotrack_excel": True,
-                            "lymphotrack_excel_path": excel_file,
-                        }
-                    },
-                )
-                touch_file(excel_file)
-                logging.info(f"Found Excel file and is added for sample: {sample_id}")
+                sample_update["lymphotrack_excel"] = True
+                sample_update["lymphotrack_excel_path"] = excel_file
+                sample_files.append(excel_file)
+                logging.info(f"Found Excel file for sample: {sample_id}")
             else:
                 logging.warning(f"No Excel file found for sample: {sample_id}")
 
             if qc_file:
                 qc_stats = self.get_qc_stats(qc_file)
-                self.db_collection.update_one(
-                    {"name": sample_id},
-                    {
-                        "$set": {
-                            "lymphotrack_qc": True,
-                            "lymphotrack_qc_path": qc_file,
-                            "total_bases": int(qc_stats.get("totalCount", 0)),
-                            "q30_bases": int(qc_stats.get("countQ30", 0)),
-                            "q30_per": float(qc_stats.get("indexQ30", 0.0)),
-                        }
-                    },
-                )
-                touch_file(qc_file)
-                logging.info(f"Found QC file and is added for sample: {sample_id}")
+                sample_update["lymphotrack_qc"] = True
+                sample_update["lymphotrack_qc_path"] = qc_file
+                sample_update["total_bases"] = int(qc_stats.get("totalCount", 0))
+                sample_update["q30_bases"] = int(qc_stats.get("countQ30", 0))
+                sample_update["q30_per"] = float(qc_stats.get("indexQ30", 0.0))
+                sample_files.append(qc_file)
+                logging.info(f"Found QC file for sample: {sample_id}")
             else:
                 logging.warning(f"No QC file found for sample: {sample_id}")
 
+            if sample_update:
+                operations.append(UpdateOne({"name": sample_id}, {"$set": sample_update}))
+                added_files.append(sample_files)
+
+        if not operations:
+            return None
+
+        # One round-trip for all samples; an unordered write lets the others through if one fails
+        failed = set()
+        try:
+            self.db_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                logger.error(f"Error adding Lymphotrack results: {error.get('errmsg')}")
+
+        for index, files in enumerate(added_files):
+            if index not in failed:
+                for file in files:
+                    touch_file(file)
+
+        if failed:
+            logger.error(
+                f"Lymphotrack results update failed for {len(failed)} of {len(operations)} samples."
+            )
+        else:
             logger.info("Lymphotrack results updated successfully.")
 
         return None
@@ -546,18 +674,20 @@ class CllGenieAddLymphotrackResults:
     def get_qc_stats(self, qc_file) -> dict:
         stats = {}
         with open(qc_file, "r") as qc_fh:
-            qc_data = qc_fh.readlines()
-            for line in qc_data:
-                stats[line.split("\t")[0].strip()] = str(
-                    line.split("\t")[1].strip().replace(",", ".")
-                )
+            for line in qc_fh:
+                parts = line.split("\t", 2)
+                if len(parts) < 2:
+                    continue
+                stats[parts[0].strip()] = parts[1].strip().replace(",", ".")
 
         return stats
 
 
 def touch_file(file_path: str):
     """
-    Create an empty file at the specified path if it does not already exist.
+    Mark a lymphotrack result file as added by creating an empty "{file_path}.added" next to it.
+
+    scan_lymphotrack_dir skips files with such a marker in the same directory listing.
     """
     try:
         Path(file_path + ".added").touch()
@@ -727,7 +857,7 @@ def get_time_now():
     Returns:
         str: Current time in "YYYY-MM-DD HH:MM:SS" format.
     """
-    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return time.strftime(TIME_FORMAT)
 
 
 if __name__ == "__main__":
@@ -755,35 +885,32 @@ if __name__ == "__main__":
         logger.info("Using production configuration. (use -pc to print the config)")
 
     # DB Connections
-    db_conn = MongoDBConnection(config["DB_NAME"], config["DB_COLLECTION"])
-    db_conn.connect()
-    db_collection = db_conn.get_collection()
+    with MongoDBConnection(config["DB_NAME"], config["DB_COLLECTION"]) as db_conn:
+        db_collection = db_conn.get_collection()
 
-    # Register Samples
-    if not config["UPDATE_LYMPHOTRACK_RESULTS"]:
-        logging.info(
-            f"{'*' * 10} Scavenging for Lymphotrack Samples started at {config['DATETIME']} {'*' * 10}"
-        )
+        # Register Samples
+        if not config["UPDATE_LYMPHOTRACK_RESULTS"]:
+            logging.info(
+                f"{'*' * 10} Scavenging for Lymphotrack Samples started at {config['DATETIME']} {'*' * 10}"
+            )
 
-        cll_genie = CllGenieSampleRegister(config, db_collection)
-        cll_genie.register_samples()
+            cll_genie = CllGenieSampleRegister(config, db_collection)
+            cll_genie.register_samples()
 
-        logging.info(
-            f"{'*' * 10} Scavenging for Lymphotrack Samples completed at {get_time_now()} {'*' * 10}"
-        )
+            logging.info(
+                f"{'*' * 10} Scavenging for Lymphotrack Samples completed at {get_time_now()} {'*' * 10}"
+            )
+
+            logging.info(
+                f"{'*' * 10} Scavenging for Lymphotrack results started at {get_time_now()} {'*' * 10}"
+            )
 
+        # Update Lymphotrack Results
         logging.info(
             f"{'*' * 10} Scavenging for Lymphotrack results started at {get_time_now()} {'*' * 10}"
         )
-
-    # Update Lymphotrack Results
-    logging.info(
-        f"{'*' * 10} Scavenging for Lymphotrack results started at {get_time_now()} {'*' * 10}"
-    )
-    cll_genie_update = CllGenieAddLymphotrackResults(config, db_collection)
-    cll_genie_update.update_lymphotrack_results()
-    logging.info(
-        f"{'*' * 10} Scavenging for Lymphotrack results completed at {get_time_now()}. Bye {'*' * 10}"
-    )
-
-    db_conn.close()
+        cll_genie_update = CllGenieAddLymphotrackResults(config, db_collection)
+        cll_genie_update.update_lymphotrack_results()
+        logging.info(
+            f"{'*' * 10} Scavenging for Lymphotrack results completed at {get_time_now()}. Bye {'*' * 10}"
+        )
@@ -6,6 +6,7 @@ It sets the application version, configures logging for Gunicorn, and runs the
 application if executed directly.
 
 Imports:
+    logging - Used to attach the Gunicorn log handlers.
     from cll_genie: create_app - Function to initialize the Flask application.
     from version: __version__ - The version of the application.
 
@@ -18,6 +19,8 @@ Behavior:
     - Runs the application on host `0.0.0.0` and port `8000` when executed directly.
 """
 
+import logging
+
 from cll_genie import create_app
 from version import __version__
 
@@ -27,12 +30,10 @@ if cll_genie_app.config["APP_VERSION"] is None:
     cll_genie_app.config["APP_VERSION"] = __version__
 
 if __name__ != "__main__":
-    print("Setting up Gunicorn logging.")
-    import logging
-
     gunicorn_logger = logging.getLogger("gunicorn.error")
     cll_genie_app.logger.handlers = gunicorn_logger.handlers
     cll_genie_app.logger.setLevel(gunicorn_logger.level)
+    cll_genie_app.logger.info("Gunicorn logging set up.")
 
 if __name__ == "__main__":
     cll_genie_app.run(host="0.0.0.0", port=8000)
\ No newline at end of file